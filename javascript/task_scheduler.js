@@ -26,6 +26,11 @@
     // Current tab in task list (active, history, bookmarks)
     let currentTaskTab = 'active';
 
+    // How many tasks to fetch per refresh. Active tasks sort first, so this
+    // only trims old history; "Load more" raises it by another page.
+    const QUEUE_PAGE_SIZE = 200;
+    let queueLimit = QUEUE_PAGE_SIZE;
+
     // Bookmark settings
     let bookmarkPromptName = false;
 
@@ -143,9 +148,9 @@
         }
 
         // Date formatting: yyyy-MM-dd hh:mm am/pm
-        const formatDate = (isoString) => {
-            if (!isoString) return '';
-            const date = new Date(isoString);
+        const formatDate = (timestamp) => {
+            if (!timestamp) return '';
+            const date = new Date(timestamp);
             const yyyy = date.getFullYear();
             const MM = String(date.getMonth() + 1).padStart(2, '0');
             const dd = String(date.getDate()).padStart(2, '0');
@@ -279,11 +284,13 @@
     }
 
     // Render task list HTML with tabbed interface (Active, History, Bookmarks)
-    function renderTaskList(tasks, bookmarks) {
+    function renderTaskList(tasks, bookmarks, historyTotal) {
         // Separate active (pending/running/paused) from history (completed/failed/cancelled/stopped)
         const activeTasks = tasks ? tasks.filter(t => t.status === 'pending' || t.status === 'running' || t.status === 'paused') : [];
         const historyTasks = tasks ? tasks.filter(t => t.status === 'completed' || t.status === 'failed' || t.status === 'cancelled' || t.status === 'stopped') : [];
         const bookmarksList = bookmarks || [];
+        // Only a page of history may be loaded - count from queue stats when known
+        const historyCount = historyTotal !== undefined ? historyTotal : historyTasks.length;
 
         // Clean up selected tasks that no longer exist
         const activeIds = new Set(activeTasks.map(t => t.id));
@@ -303,7 +310,7 @@
         html += `<button class='ts-tab ${currentTaskTab === 'history' ? 'active' : ''}' onclick='window.switchTaskTab("history")'>
             <span class='ts-tab-icon'>📜</span>
             <span class='ts-tab-label'>History</span>
-            <span class='ts-tab-count'>${historyTasks.length}</span>
+            <span class='ts-tab-count'>${historyCount}</span>
         </button>`;
         html += `<button class='ts-tab ${currentTaskTab === 'bookmarks' ? 'active' : ''}' onclick='window.switchTaskTab("bookmarks")'>
             <span class='ts-tab-icon'>⭐</span>
@@ -345,6 +352,11 @@
                     html += renderTaskItem(task, i + 1, 'history');
                 });
                 html += "</div>";
+                if (historyTasks.length < historyCount) {
+                    html += `<button class='ts-load-more' onclick='window.taskSchedulerLoadMore()'>
+                        Load more (${historyTasks.length} of ${historyCount})
+                    </button>`;
+                }
             } else {
                 html += "<div class='task-empty'>No completed tasks yet.</div>";
             }
@@ -377,6 +389,12 @@
         return html;
     }
 
+    // Fetch another page of history on the next refresh
+    window.taskSchedulerLoadMore = function() {
+        queueLimit += QUEUE_PAGE_SIZE;
+        refreshTaskList(true);
+    };
+
     // Switch between task tabs
     window.switchTaskTab = function(tab) {
         currentTaskTab = tab;
@@ -790,7 +808,7 @@
         try {
             // Fetch tasks, status, and bookmarks in parallel
             const [tasksResponse, statusResponse, bookmarksResponse] = await Promise.all([
-                fetch('/task-scheduler/queue'),
+                fetch(`/task-scheduler/queue?limit=${queueLimit}`),
                 fetch('/task-scheduler/status'),
                 fetch('/task-scheduler/bookmarks')
             ]);
@@ -804,7 +822,7 @@
             const bookmarks = bookmarksData.success ? (bookmarksData.bookmarks || []) : [];
 
             // Check if data changed using hash
-            const newTasksHash = simpleHash(JSON.stringify(tasksData.tasks) + JSON.stringify(bookmarks));
+            const newTasksHash = simpleHash(JSON.stringify(tasksData.tasks) + JSON.stringify(bookmarks) + JSON.stringify(statusData.queue_stats));
             const newStatusHash = simpleHash(JSON.stringify(statusData));
 
             const tasksChanged = newTasksHash !== lastTasksHash;
@@ -821,7 +839,8 @@
                 if (taskListEl) {
                     // Find the actual HTML container inside Gradio's wrapper
                     const htmlContainer = taskListEl.querySelector('.prose') || taskListEl;
-                    htmlContainer.innerHTML = renderTaskList(tasksData.tasks, bookmarks);
+                    const historyTotal = (stats.completed || 0) + (stats.failed || 0) + (stats.cancelled || 0) + (stats.stopped || 0);
+                    htmlContainer.innerHTML = renderTaskList(tasksData.tasks, bookmarks, historyTotal);
                 }
             }
 
@@ -910,8 +929,8 @@
                                 <tr><td>Type</td><td>${task.task_type}</td></tr>
                                 <tr><td>Status</td><td><span class="status-badge-mini status-${task.status}">${task.status}</span></td></tr>
                                 <tr><td>Checkpoint</td><td>${task.checkpoint || 'Default'}</td></tr>
-                                <tr><td>Created</td><td>${task.created_at || 'Unknown'}</td></tr>
-                                ${task.completed_at ? `<tr><td>Completed</td><td>${task.completed_at}</td></tr>` : ''}
+                                <tr><td>Created</td><td>${task.created_at ? new Date(task.created_at).toLocaleString() : 'Unknown'}</td></tr>
+                                ${task.completed_at ? `<tr><td>Completed</td><td>${new Date(task.completed_at).toLocaleString()}</td></tr>` : ''}
                             </table>
                         </div>
                         <div class="task-details-section">
@@ -2960,6 +2979,20 @@
             .task-list-history .task-item {
                 opacity: 0.8;
             }
+            .ts-load-more {
+                display: block;
+                width: 100%;
+                margin-top: 8px;
+                padding: 8px;
+                background: var(--block-background-fill, #1f2937);
+                border: 1px dashed var(--border-color-primary, #374151);
+                border-radius: 6px;
+                color: var(--body-text-color-subdued, #9ca3af);
+                cursor: pointer;
+            }
+            .ts-load-more:hover {
+                color: var(--body-text-color, #e5e7eb);
+            }
             /* Selection mode styles */
             .task-section-header-row {
                 display: flex;
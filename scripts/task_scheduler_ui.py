@@ -27,7 +27,7 @@ if scripts_dir not in sys.path:
 from modules import script_callbacks, shared, scripts
 from task_scheduler.models import Task, TaskStatus, TaskType
 from task_scheduler.queue_manager import get_queue_manager
-from task_scheduler.executor import get_executor
+from task_scheduler.executor import get_executor, invalidate_script_defaults_cache
 
 # ============================================================================
 # Method Configuration
@@ -713,3 +713,4 @@ script_callbacks.on_ui_tabs(on_ui_tabs)
 script_callbacks.on_after_component(on_after_component)
 script_callbacks.on_app_started(on_app_started)
 script_callbacks.on_ui_settings(on_ui_settings)
+script_callbacks.on_before_ui(invalidate_script_defaults_cache)
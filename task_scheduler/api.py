@@ -2,16 +2,50 @@
 FastAPI endpoints for Task Scheduler.
 Provides REST API for queue operations.
 """
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Optional, List, Any
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from typing import Optional, List, Any, Callable, Literal
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import logging
+import operator
 import traceback
+import uuid
 
+from .log import logger
 from .models import Task, TaskStatus, TaskType
 from .queue_manager import get_queue_manager
 from .executor import get_executor
 
+# Resolve Forge's shared module once instead of importing it per request
+try:
+    from modules import shared
+except ImportError:
+    shared = None
+
+
+def get_current_checkpoint() -> str:
+    """Get the currently selected checkpoint model."""
+    if shared is None:
+        return ""
+    return shared.opts.sd_model_checkpoint or ""
+
+
+# Bounded pool for blocking queue/database calls, created in setup_api().
+# Keeps the event loop free while capping concurrency against the DB lock.
+API_WORKER_THREADS = 4
+_blocking_pool: Optional[ThreadPoolExecutor] = None
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call in the API worker pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_pool, functools.partial(func, *args, **kwargs))
+
+
 # Import intercept functions from the script
 def get_intercept_functions():
     """Get intercept functions from the queue_interceptor script."""
@@ -29,6 +63,35 @@ def get_intercept_functions():
         return None, None, None, None
 
 
+# Keys of a /queue task summary, in response order
+TASK_SUMMARY_FIELDS = (
+    "id", "task_type", "status", "name", "checkpoint",
+    "created_at", "completed_at", "priority", "requeued_task_id",
+)
+_get_summary_attrs = operator.attrgetter(
+    "id", "task_type", "status", "created_at", "completed_at", "priority", "requeued_task_id"
+)
+
+
+def task_summary(t: Task, restore_strategy) -> dict:
+    """Build the /queue list entry for a task."""
+    task_id, task_type, status, created_at, completed_at, priority, requeued_task_id = _get_summary_attrs(t)
+    summary = dict(zip(TASK_SUMMARY_FIELDS, (
+        task_id,
+        task_type.value,
+        status.value,
+        t.get_display_name(),
+        t.get_short_checkpoint(),
+        created_at.isoformat() if created_at else None,
+        completed_at.isoformat() if completed_at else None,
+        priority,
+        requeued_task_id,
+    )))
+    # Merge display info fields (the strategy validates against schema)
+    summary.update(restore_strategy.extract_display_info(t.params))
+    return summary
+
+
 class QueueTaskRequest(BaseModel):
     """Request body for queuing a task."""
     prompt: str = ""
@@ -43,7 +106,7 @@ class QueueTaskRequest(BaseModel):
     sampler_name: str = "Euler"
     scheduler: str = "automatic"
     # Additional parameters can be added as needed
-    extra_params: dict = {}
+    extra_params: dict = Field(default_factory=dict)
 
 
 class TaskResponse(BaseModel):
@@ -58,6 +121,12 @@ class TaskResponse(BaseModel):
 
 def setup_api(app: FastAPI):
     """Register API endpoints with the FastAPI app."""
+    global _blocking_pool
+    if _blocking_pool is None:
+        _blocking_pool = ThreadPoolExecutor(
+            max_workers=API_WORKER_THREADS,
+            thread_name_prefix="TaskSchedulerAPI"
+        )
 
     @app.post("/task-scheduler/queue/txt2img")
     async def queue_txt2img(request: QueueTaskRequest):
@@ -66,11 +135,7 @@ def setup_api(app: FastAPI):
             queue_manager = get_queue_manager()
 
             # Get current checkpoint
-            try:
-                from modules import shared
-                checkpoint = shared.opts.sd_model_checkpoint or ""
-            except Exception:
-                checkpoint = ""
+            checkpoint = get_current_checkpoint()
 
             # Build params dict
             params = {
@@ -89,14 +154,16 @@ def setup_api(app: FastAPI):
             }
 
             # Debug logging
-            print(f"[TaskScheduler] Queuing txt2img task")
-            print(f"[TaskScheduler] extra_params received: {request.extra_params}")
-            print(f"[TaskScheduler] Final params keys: {list(params.keys())}")
-            if 'enable_hr' in params:
-                print(f"[TaskScheduler] Hires.fix enabled: {params.get('enable_hr')}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Queuing txt2img task")
+                logger.debug("extra_params received: %s", request.extra_params)
+                logger.debug("Final params keys: %s", list(params))
+                if 'enable_hr' in params:
+                    logger.debug("Hires.fix enabled: %s", params.get('enable_hr'))
 
             # Create task
-            task = queue_manager.add_task(
+            task = await run_blocking(
+                queue_manager.add_task,
                 task_type=TaskType.TXT2IMG,
                 params=params,
                 checkpoint=checkpoint,
@@ -123,11 +190,7 @@ def setup_api(app: FastAPI):
             queue_manager = get_queue_manager()
 
             # Get current checkpoint
-            try:
-                from modules import shared
-                checkpoint = shared.opts.sd_model_checkpoint or ""
-            except Exception:
-                checkpoint = ""
+            checkpoint = get_current_checkpoint()
 
             # Build params dict
             params = {
@@ -147,7 +210,8 @@ def setup_api(app: FastAPI):
             }
 
             # Create task
-            task = queue_manager.add_task(
+            task = await run_blocking(
+                queue_manager.add_task,
                 task_type=TaskType.IMG2IMG,
                 params=params,
                 checkpoint=checkpoint,
@@ -167,40 +231,69 @@ def setup_api(app: FastAPI):
                 "error": str(e)
             }, status_code=500)
 
+    # Serialized /queue body, keyed by the queue version it was built from.
+    # The per-process tag keeps ETags from matching across restarts.
+    queue_cache = {"key": None, "body": None}
+    etag_tag = uuid.uuid4().hex[:8]
+
     @app.get("/task-scheduler/queue")
-    async def get_queue():
-        """Get all tasks in the queue."""
+    async def get_queue(
+        request: Request,
+        limit: Optional[int] = Query(None, ge=1),
+        offset: int = Query(0, ge=0)
+    ):
+        """
+        Get tasks in the queue, in list order (active first, then history).
+
+        Pass limit/offset to fetch one page instead of the whole table.
+        """
         try:
             from .param_capture import get_restore_strategy
 
             queue_manager = get_queue_manager()
-            tasks = queue_manager.get_all_tasks()
+
+            # Read the version before fetching so a concurrent change can only
+            # make the cached body look older than it is, never newer
+            version = queue_manager.version
+            etag = f'W/"{etag_tag}-{version}"'
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+
+            cache_key = (version, limit, offset)
+            if queue_cache["key"] == cache_key:
+                return Response(
+                    content=queue_cache["body"],
+                    media_type="application/json",
+                    headers={"ETag": etag}
+                )
+
+            # Restore strategies are stateless - build one per capture format
+            strategies = {}
 
             def get_task_info(t):
                 # Get the appropriate restore strategy for this task's format
-                restore_strategy = get_restore_strategy(t.capture_format)
-
-                # Extract display info using the strategy (validates against schema)
-                display_info = restore_strategy.extract_display_info(t.params)
-
-                return {
-                    "id": t.id,
-                    "task_type": t.task_type.value,
-                    "status": t.status.value,
-                    "name": t.get_display_name(),
-                    "checkpoint": t.get_short_checkpoint(),
-                    "created_at": t.created_at.isoformat() if t.created_at else None,
-                    "completed_at": t.completed_at.isoformat() if t.completed_at else None,
-                    "priority": t.priority,
-                    "requeued_task_id": t.requeued_task_id,
-                    # Merge display info fields
-                    **display_info
-                }
-
-            return JSONResponse({
-                "success": True,
-                "tasks": [get_task_info(t) for t in tasks]
-            })
+                restore_strategy = strategies.get(t.capture_format)
+                if restore_strategy is None:
+                    restore_strategy = strategies[t.capture_format] = get_restore_strategy(t.capture_format)
+                return task_summary(t, restore_strategy)
+
+            def build_body() -> bytes:
+                tasks = queue_manager.get_all_tasks(limit=limit, offset=offset)
+                return json.dumps({
+                    "success": True,
+                    "tasks": [get_task_info(t) for t in tasks]
+                }).encode("utf-8")
+
+            # Built in full before responding, so a failure still gets a 500
+            body = await run_blocking(build_body)
+            queue_cache["key"] = cache_key
+            queue_cache["body"] = body
+
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers={"ETag": etag}
+            )
 
         except Exception as e:
             return JSONResponse({
@@ -213,16 +306,17 @@ def setup_api(app: FastAPI):
         """Get a specific task by ID."""
         try:
             queue_manager = get_queue_manager()
-            task = queue_manager.get_task(task_id)
+            task = await run_blocking(queue_manager.get_task, task_id)
 
             if not task:
                 raise HTTPException(status_code=404, detail="Task not found")
 
             task_dict = task.to_dict()
-            print(f"[TaskScheduler] Getting task {task_id}")
-            print(f"[TaskScheduler] Task params keys: {list(task.params.keys())}")
-            if 'enable_hr' in task.params:
-                print(f"[TaskScheduler] Task has enable_hr: {task.params.get('enable_hr')}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Getting task %s", task_id)
+                logger.debug("Task params keys: %s", list(task.params))
+                if 'enable_hr' in task.params:
+                    logger.debug("Task has enable_hr: %s", task.params.get('enable_hr'))
 
             return JSONResponse({
                 "success": True,
@@ -242,7 +336,7 @@ def setup_api(app: FastAPI):
         """Delete a task from the queue."""
         try:
             queue_manager = get_queue_manager()
-            success = queue_manager.delete_task(task_id)
+            success = await run_blocking(queue_manager.delete_task, task_id)
 
             if not success:
                 raise HTTPException(status_code=404, detail="Task not found")
@@ -265,7 +359,7 @@ def setup_api(app: FastAPI):
         """Cancel a pending task."""
         try:
             queue_manager = get_queue_manager()
-            success = queue_manager.cancel_task(task_id)
+            success = await run_blocking(queue_manager.cancel_task, task_id)
 
             if not success:
                 return JSONResponse({
@@ -289,7 +383,7 @@ def setup_api(app: FastAPI):
         """Retry a failed or cancelled task."""
         try:
             queue_manager = get_queue_manager()
-            new_task = queue_manager.retry_task(task_id)
+            new_task = await run_blocking(queue_manager.retry_task, task_id)
 
             if not new_task:
                 raise HTTPException(status_code=404, detail="Task not found")
@@ -322,7 +416,7 @@ def setup_api(app: FastAPI):
                 }, status_code=400)
 
             queue_manager = get_queue_manager()
-            task = queue_manager.get_task(task_id)
+            task = await run_blocking(queue_manager.get_task, task_id)
 
             if not task:
                 raise HTTPException(status_code=404, detail="Task not found")
@@ -452,7 +546,7 @@ def setup_api(app: FastAPI):
         """Clear completed/failed/cancelled tasks."""
         try:
             queue_manager = get_queue_manager()
-            count = queue_manager.clear_completed()
+            count = await run_blocking(queue_manager.clear_completed)
 
             return JSONResponse({
                 "success": True,
@@ -466,28 +560,22 @@ def setup_api(app: FastAPI):
                 "error": str(e)
             }, status_code=500)
 
-    @app.post("/task-scheduler/intercept/{tab}")
-    async def set_intercept(tab: str):
-        """Set intercept mode for the next generation."""
+    @app.post("/task-scheduler/intercept/clear")
+    async def clear_intercept():
+        """Clear the intercept mode."""
         try:
-            if tab not in ("txt2img", "img2img"):
-                return JSONResponse({
-                    "success": False,
-                    "error": f"Invalid tab: {tab}"
-                }, status_code=400)
-
-            set_intercept_mode, _, _, _ = get_intercept_functions()
-            if set_intercept_mode is None:
+            _, _, clear_mode, _ = get_intercept_functions()
+            if clear_mode is None:
                 return JSONResponse({
                     "success": False,
                     "error": "Intercept module not available"
                 }, status_code=500)
 
-            set_intercept_mode(tab)
+            clear_mode()
 
             return JSONResponse({
                 "success": True,
-                "message": f"Intercept mode enabled for {tab}"
+                "message": "Intercept mode cleared"
             })
 
         except Exception as e:
@@ -496,22 +584,24 @@ def setup_api(app: FastAPI):
                 "error": str(e)
             }, status_code=500)
 
-    @app.get("/task-scheduler/intercept/result")
-    async def get_intercept_result_api():
-        """Get the result of the last interception."""
+    # Registered after /intercept/clear so {tab} doesn't shadow it;
+    # FastAPI rejects tabs outside the Literal with a 422 before the handler runs
+    @app.post("/task-scheduler/intercept/{tab}")
+    async def set_intercept(tab: Literal["txt2img", "img2img"]):
+        """Set intercept mode for the next generation."""
         try:
-            _, get_result, _, _ = get_intercept_functions()
-            if get_result is None:
+            set_intercept_mode, _, _, _ = get_intercept_functions()
+            if set_intercept_mode is None:
                 return JSONResponse({
                     "success": False,
                     "error": "Intercept module not available"
                 }, status_code=500)
 
-            result = get_result()
+            set_intercept_mode(tab)
 
             return JSONResponse({
                 "success": True,
-                "result": result
+                "message": f"Intercept mode enabled for {tab}"
             })
 
         except Exception as e:
@@ -520,22 +610,22 @@ def setup_api(app: FastAPI):
                 "error": str(e)
             }, status_code=500)
 
-    @app.post("/task-scheduler/intercept/clear")
-    async def clear_intercept():
-        """Clear the intercept mode."""
+    @app.get("/task-scheduler/intercept/result")
+    async def get_intercept_result_api():
+        """Get the result of the last interception."""
         try:
-            _, _, clear_mode, _ = get_intercept_functions()
-            if clear_mode is None:
+            _, get_result, _, _ = get_intercept_functions()
+            if get_result is None:
                 return JSONResponse({
                     "success": False,
                     "error": "Intercept module not available"
                 }, status_code=500)
 
-            clear_mode()
+            result = get_result()
 
             return JSONResponse({
                 "success": True,
-                "message": "Intercept mode cleared"
+                "result": result
             })
 
         except Exception as e:
@@ -548,7 +638,8 @@ def setup_api(app: FastAPI):
     async def get_settings():
         """Get extension settings."""
         try:
-            from modules import shared
+            if shared is None:
+                raise RuntimeError("modules.shared not available")
 
             settings = {
                 "enable_controlnet": getattr(shared.opts, 'task_scheduler_enable_controlnet', False),
@@ -759,7 +850,7 @@ def setup_api(app: FastAPI):
             import json
 
             queue_manager = get_queue_manager()
-            task = queue_manager.get_task(task_id)
+            task = await run_blocking(queue_manager.get_task, task_id)
 
             if not task:
                 raise HTTPException(status_code=404, detail="Task not found")
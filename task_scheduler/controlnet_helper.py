@@ -4,14 +4,107 @@ ControlNet serialization/deserialization helper.
 Handles converting ControlNetUnit objects to/from JSON-serializable dicts.
 """
 import base64
+import functools
+from dataclasses import fields
+from enum import Enum
 from io import BytesIO
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 
 
+# ControlNetUnit classes seen so far (matched by name, as the extension may
+# not be importable here), so repeat checks are a set lookup
+_CONTROLNET_UNIT_TYPES = set()
+
+
 def is_controlnet_unit(obj) -> bool:
     """Check if an object is a ControlNetUnit instance."""
-    return type(obj).__name__ == 'ControlNetUnit'
+    obj_type = type(obj)
+    if obj_type in _CONTROLNET_UNIT_TYPES:
+        return True
+    if obj_type.__name__ == 'ControlNetUnit':
+        _CONTROLNET_UNIT_TYPES.add(obj_type)
+        return True
+    return False
+
+
+# ControlNetUnit class, once it has been imported
+_controlnet_unit_cls = None
+
+
+def get_controlnet_unit_class():
+    """
+    Import the ControlNetUnit class, caching it after the first success.
+
+    Raises:
+        ImportError: If the ControlNet extension is not available. Failures
+            are not cached, so a later call tries the import again.
+    """
+    global _controlnet_unit_cls
+    if _controlnet_unit_cls is None:
+        from lib_controlnet.external_code import ControlNetUnit
+        _controlnet_unit_cls = ControlNetUnit
+    return _controlnet_unit_cls
+
+
+@functools.lru_cache(maxsize=None)
+def _field_names(cls) -> Tuple[str, ...]:
+    """Get the dataclass field names of a class (static per class, so cached)."""
+    return tuple(f.name for f in fields(cls))
+
+
+def _serialize_dict_field(value: dict) -> Optional[dict]:
+    """Serialize a dict field (e.g. GradioImageMaskPair), dropping it if it holds images."""
+    # Check if it contains numpy arrays (class identity is cheaper than isinstance)
+    ndarray = np.ndarray
+    if any(v.__class__ is ndarray for v in value.values()):
+        return None
+    return value
+
+
+def _serialize_list_item(item: Any) -> Any:
+    if item.__class__ is np.ndarray:
+        return None
+    if hasattr(item, 'value'):
+        return item.value
+    return item
+
+
+def _serialize_list_field(value: list) -> list:
+    """Serialize a list field, replacing images with None and enums with their values."""
+    return [_serialize_list_item(item) for item in value]
+
+
+def _serialize_other_field(value: Any) -> Any:
+    """Serialize a field whose exact type isn't in the dispatch table."""
+    # Handle Enum types - convert to string value
+    if isinstance(value, Enum):
+        return value.value
+    # Subclasses of the container types
+    if isinstance(value, dict):
+        return _serialize_dict_field(value)
+    if isinstance(value, list):
+        return _serialize_list_field(value)
+    return value
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+# Field serializers keyed on exact type; anything else goes to _serialize_other_field
+_FIELD_HANDLERS = {
+    # For images, we'll skip them for now as they're large
+    # User would need to re-configure ControlNet images
+    np.ndarray: lambda value: None,
+    dict: _serialize_dict_field,
+    list: _serialize_list_field,
+    # Simple types (str, int, float, bool)
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+}
 
 
 def serialize_controlnet_unit(unit) -> Optional[Dict[str, Any]]:
@@ -28,55 +121,16 @@ def serialize_controlnet_unit(unit) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        from dataclasses import fields
-
         result = {}
-        for field in fields(unit):
-            value = getattr(unit, field.name)
+        for name in _field_names(type(unit)):
+            value = getattr(unit, name)
 
             # Skip None values
             if value is None:
                 continue
 
-            # Handle numpy arrays (images) - encode as base64
-            if isinstance(value, np.ndarray):
-                # For images, we'll skip them for now as they're large
-                # User would need to re-configure ControlNet images
-                # In the future, we could save to temp files
-                result[field.name] = None
-                continue
-
-            # Handle Enum types - convert to string value
-            if hasattr(value, 'value'):
-                result[field.name] = value.value
-                continue
-
-            # Handle GradioImageMaskPair (dict with numpy arrays)
-            if isinstance(value, dict):
-                # Check if it contains numpy arrays
-                has_numpy = any(isinstance(v, np.ndarray) for v in value.values())
-                if has_numpy:
-                    result[field.name] = None
-                    continue
-                result[field.name] = value
-                continue
-
-            # Handle lists
-            if isinstance(value, list):
-                # Check if list contains non-serializable items
-                serializable_list = []
-                for item in value:
-                    if isinstance(item, np.ndarray):
-                        serializable_list.append(None)
-                    elif hasattr(item, 'value'):
-                        serializable_list.append(item.value)
-                    else:
-                        serializable_list.append(item)
-                result[field.name] = serializable_list
-                continue
-
-            # Simple types (str, int, float, bool)
-            result[field.name] = value
+            handler = _FIELD_HANDLERS.get(type(value), _serialize_other_field)
+            result[name] = handler(value)
 
         # Mark as serialized ControlNet unit
         result['_is_controlnet_unit'] = True
@@ -105,16 +159,10 @@ def deserialize_controlnet_unit(data: Dict[str, Any]):
         return None
 
     try:
-        # Import ControlNetUnit
-        from lib_controlnet.external_code import ControlNetUnit
-
-        # Remove our marker
-        clean_data = {k: v for k, v in data.items() if k != '_is_controlnet_unit'}
-
-        # Use the built-in from_dict method
-        unit = ControlNetUnit.from_dict(clean_data)
-
-        return unit
+        # Use the built-in from_dict method. It only takes keys that are
+        # ControlNetUnit fields, so our marker can stay in the dict (which
+        # is still shared with task.script_args and mustn't be modified).
+        return get_controlnet_unit_class().from_dict(data)
 
     except ImportError:
         print("[TaskScheduler:ControlNet] ControlNet extension not available")
@@ -139,11 +187,16 @@ def serialize_script_arg(arg) -> Any:
 
     # Handle lists that might contain ControlNetUnit
     if isinstance(arg, (list, tuple)):
-        result = []
-        for item in arg:
+        # Find the first ControlNetUnit; if there is none, nothing changes
+        first = next((i for i, item in enumerate(arg) if is_controlnet_unit(item)), None)
+        if first is None:
+            return arg
+
+        # Only the tail from the first unit onward needs transforming
+        result = list(arg[:first])
+        for item in arg[first:]:
             if is_controlnet_unit(item):
-                serialized = serialize_controlnet_unit(item)
-                result.append(serialized)
+                result.append(serialize_controlnet_unit(item))
             else:
                 result.append(item)
         return result
@@ -167,8 +220,16 @@ def deserialize_script_arg(arg) -> Any:
 
     # Handle lists that might contain serialized ControlNetUnit
     if isinstance(arg, list):
-        result = []
-        for item in arg:
+        # Find the first serialized unit; if there is none, nothing changes
+        first = next(
+            (i for i, item in enumerate(arg) if isinstance(item, dict) and item.get('_is_controlnet_unit')),
+            None
+        )
+        if first is None:
+            return arg
+
+        result = arg[:first]
+        for item in arg[first:]:
             if isinstance(item, dict) and item.get('_is_controlnet_unit'):
                 unit = deserialize_controlnet_unit(item)
                 result.append(unit if unit is not None else item)
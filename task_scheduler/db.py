@@ -1,22 +1,261 @@
 """
 SQLite database layer for task persistence.
 """
+import functools
 import sqlite3
 import os
+import queue
 import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
 
-from .models import Task, TaskStatus
+from .models import Task, TaskStatus, _json_dumps, from_epoch_ms, to_epoch_ms
+
+
+# Generation results live in their own table (task_results), keeping the
+# tasks rows that list/stats/queue queries scan small.
+RESULT_COLUMNS = ("result_images", "result_info")
+
+# Columns of the tasks table in Task.to_dict() order. The order is fixed, so
+# the INSERT and full-row UPDATE statements are built once and reused
+# verbatim, which keeps them hot in sqlite3's per-connection statement cache.
+TASK_COLUMNS = tuple(c for c in Task().to_dict() if c not in RESULT_COLUMNS)
+_TASK_UPDATE_COLUMNS = tuple(c for c in TASK_COLUMNS if c != "id")
+
+# Columns for list views (expand_metadata=False). Leaves out script_args
+# (which can hold encoded images) and the results. params stays, the list
+# shows prompt/size info from it.
+_LIST_COLUMNS = tuple(c for c in TASK_COLUMNS if c != "script_args")
+_LIST_SELECT = f"SELECT {', '.join(_LIST_COLUMNS)} FROM tasks"
+
+# Full task rows, results included
+_FULL_SELECT = (
+    f"SELECT {', '.join(f'tasks.{c}' for c in TASK_COLUMNS)}, "
+    f"{', '.join(f'r.{c}' for c in RESULT_COLUMNS)} "
+    f"FROM tasks LEFT JOIN task_results r ON r.task_id = tasks.id"
+)
+_GET_RESULTS_SQL = f"SELECT {', '.join(RESULT_COLUMNS)} FROM task_results WHERE task_id = ?"
+_UPSERT_RESULTS_SQL = (
+    f"INSERT INTO task_results (task_id, {', '.join(RESULT_COLUMNS)}) VALUES (?, ?, ?) "
+    f"ON CONFLICT (task_id) DO UPDATE SET "
+    f"{', '.join(f'{c} = excluded.{c}' for c in RESULT_COLUMNS)}"
+)
+# Like _UPSERT_RESULTS_SQL, but a NULL value keeps the stored one (or stores
+# the empty default when the task has no results row yet)
+_MERGE_RESULTS_SQL = (
+    f"INSERT INTO task_results (task_id, {', '.join(RESULT_COLUMNS)}) VALUES (?, COALESCE(?, '[]'), COALESCE(?, '')) "
+    f"ON CONFLICT (task_id) DO UPDATE SET "
+    f"{', '.join(f'{c} = COALESCE(?, {c})' for c in RESULT_COLUMNS)}"
+)
+
+_INSERT_TASK_SQL = (
+    f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(TASK_COLUMNS))})"
+)
+_UPDATE_TASK_SQL = (
+    f"UPDATE tasks SET {', '.join(f'{c} = ?' for c in _TASK_UPDATE_COLUMNS)} "
+    f"WHERE id = ?"
+)
+# Full-row UPDATE for tasks loaded without script_args (list views)
+_LIST_UPDATE_COLUMNS = tuple(c for c in _TASK_UPDATE_COLUMNS if c != "script_args")
+_UPDATE_LIST_TASK_SQL = (
+    f"UPDATE tasks SET {', '.join(f'{c} = ?' for c in _LIST_UPDATE_COLUMNS)} "
+    f"WHERE id = ?"
+)
+
+# Status updates, keyed by which timestamp column they touch.
+# COALESCE keeps the existing error when none is passed.
+_SET_STATUS_RUNNING_SQL = "UPDATE tasks SET status = ?, started_at = ?, error = COALESCE(?, error) WHERE id = ?"
+_SET_STATUS_TERMINAL_SQL = "UPDATE tasks SET status = ?, completed_at = ?, error = COALESCE(?, error) WHERE id = ?"
+_SET_STATUS_SQL = "UPDATE tasks SET status = ?, error = COALESCE(?, error) WHERE id = ?"
+
+# Run outcomes that also store results
+_SET_COMPLETED_SQL = "UPDATE tasks SET status = ?, completed_at = ? WHERE id = ?"
+_SET_PAUSED_SQL = "UPDATE tasks SET status = ?, completed_iterations = ?, original_n_iter = ? WHERE id = ?"
+
+_SET_PRIORITY_SQL = "UPDATE tasks SET priority = ? WHERE id = ?"
+# Moves a task by a priority delta, unless that would take it below 0
+_SHIFT_PRIORITY_SQL = "UPDATE tasks SET priority = priority + ? WHERE id = ? AND priority + ? >= 0"
+
+# Atomically mark the next pending task as running and return it.
+# UPDATE ... RETURNING needs SQLite 3.35+; older versions use a transaction.
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_NEXT_PENDING_ID_SQL = """
+    SELECT id FROM tasks
+    WHERE status = 'pending'
+    ORDER BY priority ASC, created_at ASC
+    LIMIT 1
+"""
+_CLAIM_NEXT_PENDING_SQL = f"""
+    UPDATE tasks SET status = 'running', started_at = ?
+    WHERE id = ({_NEXT_PENDING_ID_SQL})
+    RETURNING *
+"""
+
+# Sort keys for the full task list, stored as generated columns so an index
+# can return rows already in order. status_order ranks active tasks first;
+# history_at is completed_at for finished tasks only.
+_ORDER_COLUMNS = [
+    ("status_order", """INTEGER GENERATED ALWAYS AS (
+        CASE status
+            WHEN 'running' THEN 0
+            WHEN 'pending' THEN 1
+            WHEN 'paused' THEN 2
+            WHEN 'completed' THEN 3
+            WHEN 'stopped' THEN 4
+            WHEN 'failed' THEN 5
+            WHEN 'cancelled' THEN 6
+        END) VIRTUAL"""),
+    ("history_at", """INTEGER GENERATED ALWAYS AS (
+        CASE
+            WHEN status IN ('completed', 'stopped', 'failed', 'cancelled') THEN completed_at
+            ELSE NULL
+        END) VIRTUAL"""),
+]
+
+_CREATE_TASKS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id TEXT PRIMARY KEY,
+        task_type TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        priority INTEGER DEFAULT 0,
+        created_at INTEGER,
+        started_at INTEGER,
+        completed_at INTEGER,
+        params TEXT,
+        checkpoint TEXT,
+        script_args TEXT,
+        error TEXT,
+        name TEXT,
+        completed_iterations INTEGER DEFAULT 0,
+        original_n_iter INTEGER DEFAULT 0,
+        requeued_task_id TEXT,
+        capture_format TEXT
+    )
+"""
+
+# Task timestamps, stored as integer epoch milliseconds
+_TIMESTAMP_COLUMNS = ("created_at", "started_at", "completed_at")
+
+
+def _legacy_timestamp_to_ms(value: Any) -> Optional[int]:
+    """Convert an ISO timestamp written by older versions to epoch milliseconds."""
+    try:
+        return to_epoch_ms(from_epoch_ms(value))
+    except (TypeError, ValueError):
+        return None
+
+
+_TERMINAL_STATUSES = frozenset((
+    TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED, TaskStatus.STOPPED
+))
+
+# Status update statement per target status. PAUSED/PENDING don't set
+# completed_at since the task can still run.
+_STATUS_UPDATE_SQL = {
+    status: (
+        _SET_STATUS_RUNNING_SQL if status == TaskStatus.RUNNING
+        else _SET_STATUS_TERMINAL_SQL if status in _TERMINAL_STATUSES
+        else _SET_STATUS_SQL
+    )
+    for status in TaskStatus
+}
+# Same, but only applied while the task is still in an expected status
+_STATUS_UPDATE_IF_SQL = {status: sql + " AND status = ?" for status, sql in _STATUS_UPDATE_SQL.items()}
+
+BOOKMARK_COLUMNS = ("id", "name", "task_type", "created_at", "params", "checkpoint", "script_args")
+_INSERT_BOOKMARK_SQL = (
+    f"INSERT INTO bookmarks ({', '.join(BOOKMARK_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(BOOKMARK_COLUMNS))})"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _bookmark_update_sql(columns: Tuple[str, ...]) -> str:
+    """
+    Build (once per column set) the UPDATE statement for a bookmark.
+
+    Column names come from the caller's dict, so they're checked against
+    BOOKMARK_COLUMNS before being put into the SQL.
+    """
+    unknown = [c for c in columns if c not in BOOKMARK_COLUMNS or c == "id"]
+    if unknown:
+        raise ValueError(f"Unknown bookmark column(s): {', '.join(unknown)}")
+    return f"UPDATE bookmarks SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?"
+
+
+# Max rows per executemany() call in the batch APIs; every chunk still goes
+# into the same transaction, this just bounds the size of each parameter list.
+BATCH_CHUNK_SIZE = 1000
+
+
+def _status_update(
+    task_id: str,
+    status: TaskStatus,
+    error: Optional[str],
+    expected_status: Optional[TaskStatus]
+) -> Tuple[str, list]:
+    """Build the (sql, params) for a status update, see TaskDatabase.update_task_status()."""
+    if expected_status is None:
+        sql = _STATUS_UPDATE_SQL[status]
+        params = [status.value, error, task_id]
+    else:
+        sql = _STATUS_UPDATE_IF_SQL[status]
+        params = [status.value, error, task_id, expected_status.value]
+    if status == TaskStatus.RUNNING or status in _TERMINAL_STATUSES:
+        # started_at / completed_at
+        params.insert(1, int(time.time() * 1000))
+    return sql, params
+
+
+def _merge_results(
+    task_id: str,
+    result_images: Optional[List[str]],
+    result_info: Optional[str]
+) -> Optional[Tuple[str, tuple]]:
+    """Build the (sql, params) storing only the given (non-empty) results, or None if there are none."""
+    if not result_images and not result_info:
+        return None
+    values = (_json_dumps(result_images) if result_images else None, result_info or None)
+    return _MERGE_RESULTS_SQL, (task_id, *values, *values)
 
 
 class TaskDatabase:
     """
     SQLite database for storing scheduled tasks.
-    Thread-safe with connection pooling per thread.
+    Thread-safe: one lock-guarded write connection plus a pool of read connections.
     """
 
+    # Applied to every new connection. WAL lets readers (UI polling) run
+    # alongside the writer, and synchronous=NORMAL is durable under WAL while
+    # avoiding an fsync per commit.
+    CONNECTION_PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-20000",  # ~20MB page cache
+        "PRAGMA mmap_size=268435456",  # 256MB
+        "PRAGMA wal_autocheckpoint=1000",
+        "PRAGMA busy_timeout=30000",
+    )
+
+    # Bump when _migrate_db gains a new step
+    SCHEMA_VERSION = 4
+
+    # Read-only connections kept for queries. Under WAL these run alongside
+    # the single writer connection, so UI polling doesn't wait on the worker.
+    # Readers beyond this get a temporary connection instead of waiting.
+    READ_POOL_SIZE = 4
+
+    # Database files whose schema is already set up in this process, mapped to
+    # whether they have the generated order columns. Further instances on the
+    # same file skip the CREATE/migration round-trips.
+    _prepared_schemas: Dict[str, bool] = {}
+    _schema_lock = threading.Lock()
+
     def __init__(self, db_path: Optional[str] = None):
         """
         Initialize the database.
@@ -31,53 +270,100 @@ class TaskDatabase:
             db_path = str(ext_dir / "task_queue.db")
 
         self.db_path = db_path
-        self._local = threading.local()
-        self._lock = threading.Lock()
+        # SQLite allows one writer at a time, so all writes share one
+        # connection. The lock is reentrant so transaction() blocks can call
+        # the other write methods; it's held for the whole block.
+        self._write_lock = threading.RLock()
+        self._writer = self._open_connection()
+        self._transaction_depth = 0
 
         # Initialize database schema
         self._init_db()
 
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get a thread-local database connection."""
-        if not hasattr(self._local, 'connection') or self._local.connection is None:
-            self._local.connection = sqlite3.connect(
-                self.db_path,
-                check_same_thread=False,
-                timeout=30.0
-            )
-            self._local.connection.row_factory = sqlite3.Row
-        return self._local.connection
+        self._read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(self.READ_POOL_SIZE):
+            self._read_pool.put(self._open_connection(read_only=True))
+
+    def _open_connection(self, read_only: bool = False) -> sqlite3.Connection:
+        """
+        Open a new database connection with the connection PRAGMAs applied.
+
+        Args:
+            read_only: If True, the connection rejects writes (PRAGMA query_only).
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            timeout=30.0
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if read_only:
+            conn.execute("PRAGMA query_only=1")
+        return conn
+
+    @contextmanager
+    def _write_connection(self):
+        """Hold the write lock and yield the write connection."""
+        with self._write_lock:
+            yield self._writer
+
+    @contextmanager
+    def _read_connection(self):
+        """
+        Borrow a connection from the read pool.
+
+        If every pooled connection is in use, a temporary one is opened (and
+        closed afterwards) rather than waiting for one to come back.
+        """
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            conn = self._open_connection(read_only=True)
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
 
     def _init_db(self):
-        """Initialize the database schema."""
-        conn = self._get_connection()
+        """Initialize the database schema (once per database file and process)."""
+        key = os.path.realpath(self.db_path)
+        with self._schema_lock:
+            if key not in self._prepared_schemas:
+                self._create_schema()
+                self._prepared_schemas[key] = self._has_order_columns
+            self._has_order_columns = self._prepared_schemas[key]
+
+    def _create_schema(self):
+        """Create tables and indexes, then migrate older databases."""
+        # Runs from __init__, before any other thread can use the writer
+        conn = self._writer
         cursor = conn.cursor()
 
+        cursor.execute(_CREATE_TASKS_TABLE_SQL.format(table="tasks"))
+
+        # Generation results, one row per task that has any
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tasks (
-                id TEXT PRIMARY KEY,
-                task_type TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'pending',
-                priority INTEGER DEFAULT 0,
-                created_at TEXT,
-                started_at TEXT,
-                completed_at TEXT,
-                params TEXT,
-                checkpoint TEXT,
-                script_args TEXT,
+            CREATE TABLE IF NOT EXISTS task_results (
+                task_id TEXT PRIMARY KEY,
                 result_images TEXT,
-                result_info TEXT,
-                error TEXT,
-                name TEXT,
-                completed_iterations INTEGER DEFAULT 0,
-                original_n_iter INTEGER DEFAULT 0
+                result_info TEXT
             )
         """)
 
-        # Index for efficient queue queries
+        # Per-status task counts, kept current by triggers so get_queue_stats
+        # doesn't have to scan the whole table on every UI poll
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_tasks_status_priority
-            ON tasks (status, priority, created_at)
+            CREATE TABLE IF NOT EXISTS task_status_counts (
+                status TEXT PRIMARY KEY,
+                n INTEGER NOT NULL DEFAULT 0
+            )
         """)
 
         # Bookmarks table
@@ -101,16 +387,89 @@ class TaskDatabase:
 
         conn.commit()
 
-        # Migration: add new columns if they don't exist
+        # Migration: add new columns if they don't exist. This may rebuild
+        # the tasks table, so its indexes and triggers are created after.
         self._migrate_db(conn)
 
+        # Partial indexes for queue polling. They only cover the few active
+        # rows, so they stay small however much history accumulates.
+        # id and status are included so the claim's "next pending id" lookup
+        # is answered from the index alone (SQLite still re-checks the
+        # partial index's WHERE column)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_pending_queue
+            ON tasks (priority ASC, created_at ASC, id, status) WHERE status = 'pending'
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tasks_paused
+            ON tasks (started_at DESC) WHERE status = 'paused'
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tasks_active
+            ON tasks (priority, created_at) WHERE status IN ('pending', 'running')
+        """)
+
+        # Superseded by the indexes above. Left in place, the planner
+        # picks it over them (it can't tell how few rows are active).
+        cursor.execute("DROP INDEX IF EXISTS idx_tasks_status_priority")
+        cursor.execute("DROP INDEX IF EXISTS idx_tasks_pending")
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_delete_results AFTER DELETE ON tasks
+            BEGIN
+                DELETE FROM task_results WHERE task_id = OLD.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_count_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_status_counts (status, n) VALUES (NEW.status, 1)
+                ON CONFLICT (status) DO UPDATE SET n = n + 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_count_delete AFTER DELETE ON tasks
+            BEGIN
+                UPDATE task_status_counts SET n = n - 1 WHERE status = OLD.status;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_count_update AFTER UPDATE OF status ON tasks
+            WHEN OLD.status IS NOT NEW.status
+            BEGIN
+                UPDATE task_status_counts SET n = n - 1 WHERE status = OLD.status;
+                INSERT INTO task_status_counts (status, n) VALUES (NEW.status, 1)
+                ON CONFLICT (status) DO UPDATE SET n = n + 1;
+            END
+        """)
+
+        conn.commit()
+
     def _migrate_db(self, conn: sqlite3.Connection):
-        """Add new columns to existing databases."""
+        """
+        Bring older databases up to SCHEMA_VERSION.
+
+        The version is recorded in PRAGMA user_version, so an up-to-date
+        database skips the column probing entirely.
+        """
         cursor = conn.cursor()
 
-        # Check existing columns
-        cursor.execute("PRAGMA table_info(tasks)")
-        existing_columns = {row[1] for row in cursor.fetchall()}
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        if version > self.SCHEMA_VERSION:
+            print(f"[TaskScheduler] Warning: database schema version {version} is newer than "
+                  f"this version of the extension supports ({self.SCHEMA_VERSION})")
+        if version >= self.SCHEMA_VERSION:
+            self._has_order_columns = True
+            return
+
+        # All changes land in one transaction, together with the version bump
+        cursor.execute("BEGIN")
+
+        # Check existing columns (table_xinfo also lists generated columns)
+        cursor.execute("PRAGMA table_xinfo(tasks)")
+        column_types = {row[1]: row[2].upper() for row in cursor.fetchall()}
+        existing_columns = set(column_types)
 
         # Add missing columns
         migrations = [
@@ -124,12 +483,139 @@ class TaskDatabase:
             if col_name not in existing_columns:
                 try:
                     cursor.execute(f"ALTER TABLE tasks ADD COLUMN {col_name} {col_type}")
+                    existing_columns.add(col_name)
                     print(f"[TaskScheduler] Added column {col_name} to database")
                 except sqlite3.OperationalError:
                     pass  # Column already exists
 
+        # Move results out of older tasks tables into task_results
+        if "result_images" in existing_columns:
+            cursor.execute("""
+                INSERT OR REPLACE INTO task_results (task_id, result_images, result_info)
+                SELECT id, result_images, result_info FROM tasks
+                WHERE result_images IS NOT NULL OR result_info IS NOT NULL
+            """)
+            for col_name in RESULT_COLUMNS:
+                try:
+                    cursor.execute(f"ALTER TABLE tasks DROP COLUMN {col_name}")
+                    existing_columns.discard(col_name)
+                except sqlite3.OperationalError:
+                    # DROP COLUMN needs SQLite 3.35+ - just empty the column
+                    cursor.execute(f"UPDATE tasks SET {col_name} = NULL")
+            print("[TaskScheduler] Moved task results to task_results table")
+
+        # Older versions stored timestamps as ISO text. Column types can't be
+        # altered in place, so copy the rows into a table with INTEGER
+        # columns, converting the values on the way.
+        if column_types.get("created_at") == "TEXT":
+            conn.create_function("epoch_ms", 1, _legacy_timestamp_to_ms, deterministic=True)
+            select_columns = ", ".join(
+                f"epoch_ms({c})" if c in _TIMESTAMP_COLUMNS else c for c in TASK_COLUMNS
+            )
+            # The triggers go with the old table; _create_schema recreates them
+            for trigger in ("trg_tasks_delete_results", "trg_tasks_count_insert",
+                            "trg_tasks_count_delete", "trg_tasks_count_update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute("DROP TABLE IF EXISTS tasks_new")
+            cursor.execute(_CREATE_TASKS_TABLE_SQL.format(table="tasks_new"))
+            cursor.execute(
+                f"INSERT INTO tasks_new ({', '.join(TASK_COLUMNS)}) "
+                f"SELECT {select_columns} FROM tasks"
+            )
+            cursor.execute("DROP TABLE tasks")
+            cursor.execute("ALTER TABLE tasks_new RENAME TO tasks")
+            existing_columns = set(TASK_COLUMNS)
+            print("[TaskScheduler] Converted task timestamps to epoch milliseconds")
+
+        for col_name, col_type in _ORDER_COLUMNS:
+            if col_name not in existing_columns:
+                try:
+                    cursor.execute(f"ALTER TABLE tasks ADD COLUMN {col_name} {col_type}")
+                    existing_columns.add(col_name)
+                    print(f"[TaskScheduler] Added column {col_name} to database")
+                except sqlite3.OperationalError:
+                    pass  # Generated columns unsupported
+
+        # Index matching get_all_tasks' ORDER BY, so the list needs no sort step.
+        # Generated columns need SQLite 3.31+; older versions sort with CASE.
+        self._has_order_columns = all(name in existing_columns for name, _ in _ORDER_COLUMNS)
+        if self._has_order_columns:
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tasks_order
+                ON tasks (status_order, history_at DESC, created_at DESC, priority)
+            """)
+
+        # Fill the status counts from existing rows; the triggers keep them
+        # current from here on
+        cursor.execute("DELETE FROM task_status_counts")
+        cursor.execute("""
+            INSERT INTO task_status_counts (status, n)
+            SELECT status, COUNT(*) FROM tasks GROUP BY status
+        """)
+
+        # Without generated columns (old SQLite) leave the version as is, so
+        # the next start probes again instead of assuming the columns exist
+        if self._has_order_columns:
+            cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
         conn.commit()
 
+    @contextmanager
+    def transaction(self):
+        """
+        Group the writes this thread makes inside the block into one commit.
+
+        Writes inside the block don't commit individually; the block commits
+        once on success. An error rolls back everything written in the block.
+        Blocks can be nested; only the outermost one commits. Other threads'
+        writes wait until the block ends.
+        """
+        with self._write_connection() as conn:
+            depth = self._transaction_depth
+            self._transaction_depth = depth + 1
+            try:
+                yield
+                if depth == 0:
+                    conn.commit()
+            except BaseException:
+                if depth == 0:
+                    conn.rollback()
+                raise
+            finally:
+                self._transaction_depth = depth
+
+    def _commit(self, conn: sqlite3.Connection) -> None:
+        """Commit a write, unless it's part of an enclosing transaction() block (write lock held)."""
+        if not self._transaction_depth:
+            conn.commit()
+
+    def _rollback(self, conn: sqlite3.Connection) -> None:
+        """Roll back a failed write, unless it's part of an enclosing transaction() block (write lock held)."""
+        # Inside a block, rolling back here would also discard the block's
+        # earlier writes; the block rolls back if the error reaches it
+        if not self._transaction_depth:
+            conn.rollback()
+
+    def _executemany_in_transaction(self, *batches: Tuple[str, List[list]]) -> None:
+        """
+        Run statements for many rows inside a single transaction.
+
+        One commit for the whole batch instead of one per row; rows are fed to
+        executemany() in chunks of BATCH_CHUNK_SIZE.
+
+        Args:
+            batches: (sql, rows) pairs, executed in order.
+        """
+        with self._write_connection() as conn:
+            try:
+                for sql, rows in batches:
+                    for start in range(0, len(rows), BATCH_CHUNK_SIZE):
+                        conn.executemany(sql, rows[start:start + BATCH_CHUNK_SIZE])
+                self._commit(conn)
+            except Exception:
+                self._rollback(conn)
+                raise
+
     def add_task(self, task: Task) -> Task:
         """
         Add a new task to the database.
@@ -140,21 +626,29 @@ class TaskDatabase:
         Returns:
             The added task (with any modifications).
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        self.add_tasks([task])
+        return task
 
-        data = task.to_dict()
-        columns = ", ".join(data.keys())
-        placeholders = ", ".join("?" * len(data))
+    def add_tasks(self, tasks: List[Task]) -> List[Task]:
+        """
+        Add several tasks in a single transaction.
 
-        with self._lock:
-            cursor.execute(
-                f"INSERT INTO tasks ({columns}) VALUES ({placeholders})",
-                list(data.values())
-            )
-            conn.commit()
+        Args:
+            tasks: The tasks to add.
 
-        return task
+        Returns:
+            The added tasks.
+        """
+        rows = []
+        result_rows = []
+        for task in tasks:
+            data = task.to_dict()
+            rows.append([data[c] for c in TASK_COLUMNS])
+            if task.result_images or task.result_info:
+                result_rows.append([data["id"], *(data[c] for c in RESULT_COLUMNS)])
+
+        self._executemany_in_transaction((_INSERT_TASK_SQL, rows), (_UPSERT_RESULTS_SQL, result_rows))
+        return tasks
 
     def get_task(self, task_id: str, expand_metadata: bool = True) -> Optional[Task]:
         """
@@ -167,97 +661,141 @@ class TaskDatabase:
         Returns:
             The task, or None if not found.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
-        row = cursor.fetchone()
+        with self._read_connection() as conn:
+            row = conn.execute(f"{_FULL_SELECT} WHERE tasks.id = ?", (task_id,)).fetchone()
 
         if row:
             return Task.from_dict(dict(row), expand_metadata=expand_metadata)
         return None
 
-    def get_all_tasks(self, include_completed: bool = True, expand_metadata: bool = False) -> List[Task]:
+    def get_all_tasks(
+        self,
+        include_completed: bool = True,
+        expand_metadata: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Task]:
         """
         Get all tasks, ordered by priority and creation time.
 
         Args:
             include_completed: Whether to include completed/failed/cancelled tasks.
             expand_metadata: If True, fully deserialize script_args. Default False for list display.
+            limit: Max number of tasks to return (None = all).
+            offset: Number of tasks to skip, for fetching later pages.
 
         Returns:
             List of tasks.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        if include_completed:
-            # Active tasks (running/pending/paused) sorted by created_at DESC (newest first)
-            # History tasks (completed/stopped/failed/cancelled) sorted by completed_at DESC
-            cursor.execute("""
-                SELECT * FROM tasks
-                ORDER BY
-                    CASE status
-                        WHEN 'running' THEN 0
-                        WHEN 'pending' THEN 1
-                        WHEN 'paused' THEN 2
-                        WHEN 'completed' THEN 3
-                        WHEN 'stopped' THEN 4
-                        WHEN 'failed' THEN 5
-                        WHEN 'cancelled' THEN 6
-                    END,
-                    CASE
-                        WHEN status IN ('completed', 'stopped', 'failed', 'cancelled') THEN completed_at
-                        ELSE NULL
-                    END DESC,
-                    created_at DESC,
-                    priority ASC
-            """)
-        else:
-            cursor.execute("""
-                SELECT * FROM tasks
-                WHERE status IN ('pending', 'running')
-                ORDER BY priority ASC, created_at ASC
-            """)
-
-        return [Task.from_dict(dict(row), expand_metadata=expand_metadata) for row in cursor.fetchall()]
-
-    def get_pending_tasks(self) -> List[Task]:
+        select = _FULL_SELECT if expand_metadata else _LIST_SELECT
+        page = ""
+        page_params = ()
+        if limit is not None or offset:
+            # LIMIT -1 means no limit
+            page = "LIMIT ? OFFSET ?"
+            page_params = (-1 if limit is None else limit, offset)
+
+        with self._read_connection() as conn:
+            if include_completed and self._has_order_columns:
+                # Same order as below, read straight off idx_tasks_order
+                cursor = conn.execute(f"""
+                    {select}
+                    ORDER BY status_order, history_at DESC, created_at DESC, priority ASC
+                    {page}
+                """, page_params)
+            elif include_completed:
+                # Active tasks (running/pending/paused) sorted by created_at DESC (newest first)
+                # History tasks (completed/stopped/failed/cancelled) sorted by completed_at DESC
+                cursor = conn.execute(f"""
+                    {select}
+                    ORDER BY
+                        CASE status
+                            WHEN 'running' THEN 0
+                            WHEN 'pending' THEN 1
+                            WHEN 'paused' THEN 2
+                            WHEN 'completed' THEN 3
+                            WHEN 'stopped' THEN 4
+                            WHEN 'failed' THEN 5
+                            WHEN 'cancelled' THEN 6
+                        END,
+                        CASE
+                            WHEN status IN ('completed', 'stopped', 'failed', 'cancelled') THEN completed_at
+                            ELSE NULL
+                        END DESC,
+                        created_at DESC,
+                        priority ASC
+                    {page}
+                """, page_params)
+            else:
+                cursor = conn.execute(f"""
+                    {select}
+                    WHERE status IN ('pending', 'running')
+                    ORDER BY priority ASC, created_at ASC
+                    {page}
+                """, page_params)
+            rows = cursor.fetchall()
+
+        return [Task.from_dict(dict(row), expand_metadata=expand_metadata) for row in rows]
+
+    def get_pending_tasks(self, expand_metadata: bool = True) -> List[Task]:
         """
         Get all pending tasks, ordered by priority and creation time.
 
+        Args:
+            expand_metadata: If True, fully deserialize script_args. If False,
+                             only the list-view columns are read.
+
         Returns:
             List of pending tasks.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        select = _FULL_SELECT if expand_metadata else _LIST_SELECT
 
-        cursor.execute("""
-            SELECT * FROM tasks
-            WHERE status = 'pending'
-            ORDER BY priority ASC, created_at ASC
-        """)
+        with self._read_connection() as conn:
+            rows = conn.execute(f"""
+                {select}
+                WHERE status = 'pending'
+                ORDER BY priority ASC, created_at ASC
+            """).fetchall()
 
-        return [Task.from_dict(dict(row)) for row in cursor.fetchall()]
+        return [Task.from_dict(dict(row), expand_metadata=expand_metadata) for row in rows]
 
-    def get_next_pending_task(self) -> Optional[Task]:
+    def claim_next_pending_task(self) -> Optional[Task]:
         """
-        Get the next pending task to execute.
+        Mark the next pending task as running and return it, in one step.
+
+        Unlike reading the next pending task and then updating its status, no
+        other writer can pick the same task in between.
 
         Returns:
-            The next pending task with full metadata, or None if queue is empty.
+            The claimed task (now running) with full metadata, or None if queue is empty.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        now = int(time.time() * 1000)
+
+        with self._write_connection() as conn:
+            try:
+                if _HAS_RETURNING:
+                    row = conn.execute(_CLAIM_NEXT_PENDING_SQL, (now,)).fetchone()
+                    if row:
+                        # RETURNING only covers the tasks row; add its results
+                        row = dict(row)
+                        results = conn.execute(_GET_RESULTS_SQL, (row["id"],)).fetchone()
+                        for col_name in RESULT_COLUMNS:
+                            row[col_name] = results[col_name] if results else None
+                else:
+                    # Take the write lock up front so the SELECT and UPDATE can't
+                    # interleave. Inside a transaction() block that block's
+                    # transaction already covers both (and BEGIN would fail).
+                    if not self._transaction_depth:
+                        conn.execute("BEGIN IMMEDIATE")
+                    row = conn.execute(_NEXT_PENDING_ID_SQL).fetchone()
+                    if row:
+                        conn.execute(_SET_STATUS_RUNNING_SQL, (TaskStatus.RUNNING.value, now, None, row["id"]))
+                        row = conn.execute(f"{_FULL_SELECT} WHERE tasks.id = ?", (row["id"],)).fetchone()
+                self._commit(conn)
+            except Exception:
+                self._rollback(conn)
+                raise
 
-        cursor.execute("""
-            SELECT * FROM tasks
-            WHERE status = 'pending'
-            ORDER BY priority ASC, created_at ASC
-            LIMIT 1
-        """)
-
-        row = cursor.fetchone()
         if row:
             return Task.from_dict(dict(row), expand_metadata=True)
         return None
@@ -269,17 +807,14 @@ class TaskDatabase:
         Returns:
             The paused task with full metadata, or None if no paused tasks.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._read_connection() as conn:
+            row = conn.execute(f"""
+                {_FULL_SELECT}
+                WHERE status = 'paused'
+                ORDER BY started_at DESC
+                LIMIT 1
+            """).fetchone()
 
-        cursor.execute("""
-            SELECT * FROM tasks
-            WHERE status = 'paused'
-            ORDER BY started_at DESC
-            LIMIT 1
-        """)
-
-        row = cursor.fetchone()
         if row:
             return Task.from_dict(dict(row), expand_metadata=True)
         return None
@@ -291,26 +826,53 @@ class TaskDatabase:
         Args:
             task: The task with updated fields.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        self.update_tasks([task])
 
-        data = task.to_dict()
-        task_id = data.pop("id")
-        set_clause = ", ".join(f"{k} = ?" for k in data.keys())
+    def update_tasks(self, tasks: List[Task]) -> None:
+        """
+        Update several existing tasks in a single transaction.
 
-        with self._lock:
-            cursor.execute(
-                f"UPDATE tasks SET {set_clause} WHERE id = ?",
-                list(data.values()) + [task_id]
-            )
-            conn.commit()
+        Fields a task was loaded without (Task.unloaded, e.g. list views)
+        keep their stored values.
+
+        Args:
+            tasks: The tasks with updated fields.
+        """
+        rows = []
+        list_rows = []
+        result_rows = []
+        merge_rows = []
+        for task in tasks:
+            data = task.to_dict()
+            unloaded = task.unloaded
+            if "script_args" in unloaded:
+                values = [data[c] for c in _LIST_UPDATE_COLUMNS]
+                list_rows.append(values)
+            else:
+                values = [data[c] for c in _TASK_UPDATE_COLUMNS]
+                rows.append(values)
+            values.append(data["id"])
+            if unloaded.isdisjoint(RESULT_COLUMNS):
+                result_rows.append([data["id"], *(data[c] for c in RESULT_COLUMNS)])
+            else:
+                # NULL keeps the stored value of a result field that wasn't loaded
+                results = [None if c in unloaded else data[c] for c in RESULT_COLUMNS]
+                merge_rows.append([data["id"], *results, *results])
+
+        self._executemany_in_transaction(
+            (_UPDATE_TASK_SQL, rows),
+            (_UPDATE_LIST_TASK_SQL, list_rows),
+            (_UPSERT_RESULTS_SQL, result_rows),
+            (_MERGE_RESULTS_SQL, merge_rows),
+        )
 
     def update_task_status(
         self,
         task_id: str,
         status: TaskStatus,
-        error: Optional[str] = None
-    ) -> None:
+        error: Optional[str] = None,
+        expected_status: Optional[TaskStatus] = None
+    ) -> bool:
         """
         Update a task's status.
 
@@ -318,31 +880,133 @@ class TaskDatabase:
             task_id: The task ID.
             status: The new status.
             error: Optional error message (for failed status).
+            expected_status: If given, only update while the task is still in
+                             this status (checked in the same statement).
+
+        Returns:
+            True if a task was updated.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        sql, params = _status_update(task_id, status, error, expected_status)
+        with self._write_connection() as conn:
+            cursor = conn.execute(sql, params)
+            self._commit(conn)
+        return cursor.rowcount > 0
 
-        from datetime import datetime
+    def set_task_status(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        error: Optional[str] = None,
+        expected_status: Optional[TaskStatus] = None
+    ) -> Optional[Task]:
+        """
+        Update a task's status and return the updated task.
 
-        updates = {"status": status.value}
+        Same as update_task_status(), but the task is read back in the same
+        transaction, so it reflects this update and no other write.
 
-        if status == TaskStatus.RUNNING:
-            updates["started_at"] = datetime.now().isoformat()
-        elif status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED, TaskStatus.STOPPED):
-            updates["completed_at"] = datetime.now().isoformat()
-        # PAUSED status doesn't set completed_at since it can be resumed
+        Returns:
+            The updated task with full metadata, or None if nothing was updated.
+        """
+        sql, params = _status_update(task_id, status, error, expected_status)
+        return self._update_and_get_task(task_id, sql, params)
 
-        if error is not None:
-            updates["error"] = error
+    def complete_task(self, task_id: str, result_images: List[str], result_info: str) -> Optional[Task]:
+        """
+        Mark a task as completed and store its results, in one transaction.
 
-        set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
+        Returns:
+            The updated task with full metadata, or None if not found.
+        """
+        return self._update_and_get_task(
+            task_id,
+            _SET_COMPLETED_SQL,
+            (TaskStatus.COMPLETED.value, int(time.time() * 1000), task_id),
+            (_UPSERT_RESULTS_SQL, (task_id, _json_dumps(result_images), result_info)),
+        )
+
+    def stop_task(
+        self,
+        task_id: str,
+        result_images: Optional[List[str]] = None,
+        result_info: Optional[str] = None
+    ) -> Optional[Task]:
+        """
+        Mark a task as stopped, in one transaction.
 
-        with self._lock:
-            cursor.execute(
-                f"UPDATE tasks SET {set_clause} WHERE id = ?",
-                list(updates.values()) + [task_id]
-            )
-            conn.commit()
+        Results are only stored if given; otherwise the existing ones are kept.
+
+        Returns:
+            The updated task with full metadata, or None if not found.
+        """
+        return self._update_and_get_task(
+            task_id,
+            _SET_COMPLETED_SQL,
+            (TaskStatus.STOPPED.value, int(time.time() * 1000), task_id),
+            _merge_results(task_id, result_images, result_info),
+        )
+
+    def pause_task(
+        self,
+        task_id: str,
+        completed_iterations: int,
+        original_n_iter: int,
+        result_images: Optional[List[str]] = None,
+        result_info: Optional[str] = None
+    ) -> Optional[Task]:
+        """
+        Mark a task as paused with its progress, in one transaction.
+
+        Results are only stored if given; otherwise the existing ones are kept.
+
+        Returns:
+            The updated task with full metadata, or None if not found.
+        """
+        return self._update_and_get_task(
+            task_id,
+            _SET_PAUSED_SQL,
+            (TaskStatus.PAUSED.value, completed_iterations, original_n_iter, task_id),
+            _merge_results(task_id, result_images, result_info),
+        )
+
+    def _update_and_get_task(
+        self,
+        task_id: str,
+        sql: str,
+        params: Any,
+        results: Optional[Tuple[str, Any]] = None
+    ) -> Optional[Task]:
+        """
+        Run an UPDATE of one task and read the task back, in one transaction.
+
+        The UPDATE takes the write lock, so the task read back is exactly what
+        this update left behind.
+
+        Args:
+            task_id: The task ID.
+            sql: UPDATE statement for the task's row.
+            params: Its parameters.
+            results: Optional (sql, params) writing task_results, run only if
+                     the UPDATE matched.
+
+        Returns:
+            The updated task with full metadata, or None if nothing was updated.
+        """
+        with self._write_connection() as conn:
+            try:
+                row = None
+                if conn.execute(sql, params).rowcount > 0:
+                    if results is not None:
+                        conn.execute(*results)
+                    row = conn.execute(f"{_FULL_SELECT} WHERE tasks.id = ?", (task_id,)).fetchone()
+                self._commit(conn)
+            except Exception:
+                self._rollback(conn)
+                raise
+
+        if row:
+            return Task.from_dict(dict(row), expand_metadata=True)
+        return None
 
     def delete_task(self, task_id: str) -> bool:
         """
@@ -354,13 +1018,10 @@ class TaskDatabase:
         Returns:
             True if the task was deleted, False if not found.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        with self._lock:
-            cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+        with self._write_connection() as conn:
+            cursor = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self._commit(conn)
+        return cursor.rowcount > 0
 
     def clear_completed(self) -> int:
         """
@@ -369,16 +1030,13 @@ class TaskDatabase:
         Returns:
             Number of tasks deleted.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        with self._lock:
-            cursor.execute("""
+        with self._write_connection() as conn:
+            cursor = conn.execute("""
                 DELETE FROM tasks
                 WHERE status IN ('completed', 'failed', 'cancelled', 'stopped')
             """)
-            conn.commit()
-            return cursor.rowcount
+            self._commit(conn)
+        return cursor.rowcount
 
     def get_queue_stats(self) -> dict:
         """
@@ -387,14 +1045,8 @@ class TaskDatabase:
         Returns:
             Dictionary with counts by status.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT status, COUNT(*) as count
-            FROM tasks
-            GROUP BY status
-        """)
+        with self._read_connection() as conn:
+            rows = conn.execute("SELECT status, n AS count FROM task_status_counts").fetchall()
 
         stats = {
             "pending": 0,
@@ -407,35 +1059,47 @@ class TaskDatabase:
             "total": 0
         }
 
-        for row in cursor.fetchall():
+        for row in rows:
             stats[row["status"]] = row["count"]
             stats["total"] += row["count"]
 
         return stats
 
-    def reorder_task(self, task_id: str, new_priority: int) -> None:
+    def reorder_task(self, task_id: str, new_priority: int) -> Optional[Task]:
         """
         Change a task's priority.
 
         Args:
             task_id: The task ID.
             new_priority: The new priority value.
+
+        Returns:
+            The updated task with full metadata, or None if not found.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        return self._update_and_get_task(task_id, _SET_PRIORITY_SQL, (new_priority, task_id))
 
-        with self._lock:
-            cursor.execute(
-                "UPDATE tasks SET priority = ? WHERE id = ?",
-                (new_priority, task_id)
-            )
-            conn.commit()
+    def shift_task_priority(self, task_id: str, delta: int) -> Optional[Task]:
+        """
+        Move a task's priority by delta, unless that would make it negative.
+
+        Args:
+            task_id: The task ID.
+            delta: Amount to add to the priority.
+
+        Returns:
+            The updated task with full metadata, or None if not found or not moved.
+        """
+        return self._update_and_get_task(task_id, _SHIFT_PRIORITY_SQL, (delta, task_id, delta))
 
     def close(self):
-        """Close the database connection."""
-        if hasattr(self._local, 'connection') and self._local.connection:
-            self._local.connection.close()
-            self._local.connection = None
+        """Close the write connection and all idle read connections."""
+        with self._write_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
 
     # =========================================================================
     # Bookmark Operations
@@ -451,27 +1115,31 @@ class TaskDatabase:
         Returns:
             The added bookmark data.
         """
-        import uuid
+        return self.add_bookmarks([bookmark_data])[0]
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+    def add_bookmarks(self, bookmarks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add several bookmarks in a single transaction.
 
-        if 'id' not in bookmark_data:
-            bookmark_data['id'] = str(uuid.uuid4())
-        if 'created_at' not in bookmark_data:
-            bookmark_data['created_at'] = datetime.now().isoformat()
+        Args:
+            bookmarks: List of bookmark dicts (see add_bookmark). Missing id and
+                       created_at are filled in.
 
-        columns = ", ".join(bookmark_data.keys())
-        placeholders = ", ".join("?" * len(bookmark_data))
+        Returns:
+            The added bookmark dicts.
+        """
+        import uuid
 
-        with self._lock:
-            cursor.execute(
-                f"INSERT INTO bookmarks ({columns}) VALUES ({placeholders})",
-                list(bookmark_data.values())
-            )
-            conn.commit()
+        rows = []
+        for bookmark_data in bookmarks:
+            if 'id' not in bookmark_data:
+                bookmark_data['id'] = str(uuid.uuid4())
+            if 'created_at' not in bookmark_data:
+                bookmark_data['created_at'] = datetime.now().isoformat()
+            rows.append([bookmark_data.get(c) for c in BOOKMARK_COLUMNS])
 
-        return bookmark_data
+        self._executemany_in_transaction((_INSERT_BOOKMARK_SQL, rows))
+        return bookmarks
 
     def get_bookmark(self, bookmark_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -483,11 +1151,8 @@ class TaskDatabase:
         Returns:
             The bookmark data, or None if not found.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM bookmarks WHERE id = ?", (bookmark_id,))
-        row = cursor.fetchone()
+        with self._read_connection() as conn:
+            row = conn.execute("SELECT * FROM bookmarks WHERE id = ?", (bookmark_id,)).fetchone()
 
         if row:
             return dict(row)
@@ -500,15 +1165,12 @@ class TaskDatabase:
         Returns:
             List of bookmark dictionaries.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT * FROM bookmarks
-            ORDER BY created_at DESC
-        """)
-
-        return [dict(row) for row in cursor.fetchall()]
+        with self._read_connection() as conn:
+            rows = conn.execute("""
+                SELECT * FROM bookmarks
+                ORDER BY created_at DESC
+            """).fetchall()
+        return [dict(row) for row in rows]
 
     def update_bookmark(self, bookmark_id: str, updates: Dict[str, Any]) -> bool:
         """
@@ -521,18 +1183,12 @@ class TaskDatabase:
         Returns:
             True if updated, False if not found.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
+        sql = _bookmark_update_sql(tuple(updates))
 
-        with self._lock:
-            cursor.execute(
-                f"UPDATE bookmarks SET {set_clause} WHERE id = ?",
-                list(updates.values()) + [bookmark_id]
-            )
-            conn.commit()
-            return cursor.rowcount > 0
+        with self._write_connection() as conn:
+            cursor = conn.execute(sql, [*updates.values(), bookmark_id])
+            self._commit(conn)
+        return cursor.rowcount > 0
 
     def delete_bookmark(self, bookmark_id: str) -> bool:
         """
@@ -544,13 +1200,10 @@ class TaskDatabase:
         Returns:
             True if deleted, False if not found.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        with self._lock:
-            cursor.execute("DELETE FROM bookmarks WHERE id = ?", (bookmark_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+        with self._write_connection() as conn:
+            cursor = conn.execute("DELETE FROM bookmarks WHERE id = ?", (bookmark_id,))
+            self._commit(conn)
+        return cursor.rowcount > 0
 
     def get_bookmark_count(self) -> int:
         """
@@ -559,21 +1212,31 @@ class TaskDatabase:
         Returns:
             Number of bookmarks.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) as count FROM bookmarks")
-        row = cursor.fetchone()
+        with self._read_connection() as conn:
+            row = conn.execute("SELECT COUNT(*) as count FROM bookmarks").fetchone()
         return row['count'] if row else 0
 
 
 # Global database instance
 _db_instance: Optional[TaskDatabase] = None
+_db_instance_lock = threading.Lock()
 
 
 def get_database() -> TaskDatabase:
     """Get the global database instance."""
     global _db_instance
     if _db_instance is None:
-        _db_instance = TaskDatabase()
+        with _db_instance_lock:
+            if _db_instance is None:
+                _db_instance = TaskDatabase()
     return _db_instance
+
+
+__all__ = [
+    "TaskDatabase",
+    "get_database",
+    "RESULT_COLUMNS",
+    "TASK_COLUMNS",
+    "BOOKMARK_COLUMNS",
+    "BATCH_CHUNK_SIZE",
+]
@@ -2,17 +2,41 @@
 Task executor for running queued generation tasks.
 Handles background processing with proper thread safety for Forge.
 """
+import functools
+import logging
 import os
 import threading
 import time
-import traceback
+import weakref
 from datetime import datetime
 from typing import Optional, Callable, Any
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing, contextmanager
+from itertools import zip_longest
 
+from .controlnet_helper import deserialize_controlnet_unit
+from .log import logger
 from .models import Task, TaskStatus, TaskType
 from .queue_manager import get_queue_manager, QueueManager
 
+# Resolve Forge's modules once instead of importing them on every call
+try:
+    from modules import scripts, sd_models, sd_vae, shared
+    from modules.processing import process_images
+    from .param_capture import get_restore_strategy
+except ImportError:
+    scripts = sd_models = sd_vae = shared = process_images = get_restore_strategy = None
+
+try:
+    from modules_forge import main_thread
+except ImportError:
+    main_thread = None
+
+
+# Last formatted subfolder as (template, second, subfolder). Templates rarely
+# change faster than per second, so tasks in the same second reuse the result.
+_subfolder_cache: Optional[tuple[str, int, str]] = None
+
 
 def get_output_subfolder() -> str:
     """
@@ -21,19 +45,27 @@ def get_output_subfolder() -> str:
     Returns empty string if no subfolder is configured.
     The subfolder template supports strftime format codes (e.g., %Y-%m-%d).
     """
-    from modules import shared
 
     subfolder_template = getattr(shared.opts, 'task_scheduler_output_subfolder', '')
 
     if not subfolder_template:
         return ''
 
+    global _subfolder_cache
+    second = int(time.time())
+    cache = _subfolder_cache
+    if cache is not None and cache[0] == subfolder_template and cache[1] == second:
+        return cache[2]
+
     try:
         # Format the template with current datetime
         subfolder = datetime.now().strftime(subfolder_template)
+        # Sub-second codes (%f) change on every call, so don't cache those
+        if "%f" not in subfolder_template:
+            _subfolder_cache = (subfolder_template, second, subfolder)
         return subfolder
     except Exception as e:
-        print(f"[TaskScheduler] Error formatting subfolder template '{subfolder_template}': {e}")
+        logger.warning("Error formatting subfolder template '%s': %s", subfolder_template, e)
         return ''
 
 
@@ -46,7 +78,6 @@ def output_subfolder_override():
     so images are saved to: base_path/SD_WebUI_subdirs/our_subfolder/
     All metadata and references remain correct since SD WebUI handles the save.
     """
-    from modules import shared
 
     subfolder = get_output_subfolder()
     if not subfolder:
@@ -63,8 +94,8 @@ def output_subfolder_override():
     else:
         new_pattern = subfolder
 
-    print(f"[TaskScheduler] Output subfolder: {subfolder}")
-    print(f"[TaskScheduler] Directory pattern: '{original_pattern}' -> '{new_pattern}'")
+    logger.debug("Output subfolder: %s", subfolder)
+    logger.debug("Directory pattern: '%s' -> '%s'", original_pattern, new_pattern)
 
     try:
         shared.opts.directories_filename_pattern = new_pattern
@@ -72,7 +103,99 @@ def output_subfolder_override():
     finally:
         # Restore original pattern
         shared.opts.directories_filename_pattern = original_pattern
-        print(f"[TaskScheduler] Restored directory pattern: '{original_pattern}'")
+        logger.debug("Restored directory pattern: '%s'", original_pattern)
+
+
+# Checkpoint name -> CheckpointInfo, for names that repeat across tasks.
+# Entries are checked against sd_models.checkpoints_list on use, so a
+# checkpoint list refresh (which creates new infos) is picked up. Misses
+# aren't cached, so a newly added checkpoint is found on the next task.
+_checkpoint_cache: dict = {}
+_CHECKPOINT_CACHE_SIZE = 64
+
+
+def _resolve_checkpoint(checkpoint_name: str):
+    """Look up a checkpoint by name, like sd_models.get_closet_checkpoint_match (cached)."""
+    info = _checkpoint_cache.get(checkpoint_name)
+    if info is not None and sd_models.checkpoints_list.get(info.title) is info:
+        return info
+
+    info = sd_models.get_closet_checkpoint_match(checkpoint_name)
+    if info is not None:
+        if len(_checkpoint_cache) >= _CHECKPOINT_CACHE_SIZE:
+            _checkpoint_cache.clear()
+        _checkpoint_cache[checkpoint_name] = info
+    return info
+
+
+_CHECKPOINT_EXTENSIONS = (".safetensors", ".ckpt", ".gguf", ".pth", ".pt", ".bin")
+
+
+def _split_checkpoint_title(name: str) -> tuple:
+    """
+    Split a checkpoint title/name/path into its path and hash.
+
+    "sub\\Model.safetensors [abc123]" becomes ("sub/Model", "abc123"), and
+    "Model.safetensors" becomes ("Model", None).
+    """
+    path, sep, rest = name.partition(" [")
+    path = path.replace("\\", "/")
+    lower_path = path.lower()
+    for ext in _CHECKPOINT_EXTENSIONS:
+        if lower_path.endswith(ext):
+            path = path[:-len(ext)]
+            break
+    checkpoint_hash = rest.rstrip("]").lower() if sep else ""
+    return path, checkpoint_hash or None
+
+
+def _matches_checkpoint_info(checkpoint_name: str, info) -> bool:
+    """
+    Check whether a checkpoint title/name refers to the given CheckpointInfo.
+
+    When both sides have a hash, the hash decides. Otherwise the relative
+    path is compared, and the bare file name only when the name has no folder.
+    """
+    target_path, target_hash = _split_checkpoint_title(checkpoint_name)
+    if target_hash:
+        sha256 = getattr(info, "sha256", None)
+        loaded_hashes = [h.lower() for h in (getattr(info, "shorthash", None), getattr(info, "hash", None)) if h]
+        if sha256 or loaded_hashes:
+            return target_hash in loaded_hashes or bool(sha256 and sha256.lower().startswith(target_hash))
+
+    loaded_path, _ = _split_checkpoint_title(info.name)
+    if "/" in target_path:
+        return target_path == loaded_path
+    return target_path == loaded_path.rsplit("/", 1)[-1]
+
+
+def _is_checkpoint_loaded(checkpoint_name: str) -> bool:
+    """Check whether the currently loaded model is the given checkpoint."""
+    # Get current loaded model info
+    current_info = None
+    if shared.sd_model and hasattr(shared.sd_model, 'sd_checkpoint_info'):
+        current_info = shared.sd_model.sd_checkpoint_info
+    if not current_info:
+        logger.debug("No model loaded, target model: %s", checkpoint_name)
+        return False
+
+    logger.debug("Current model: %s", current_info.title)
+    logger.debug("Target model: %s", checkpoint_name)
+
+    if _matches_checkpoint_info(checkpoint_name, current_info):
+        logger.debug("Model already loaded, no switch needed")
+        return True
+
+    # Names differ (e.g. an alias or renamed reference): compare what the
+    # target actually resolves to against the loaded checkpoint
+    target_info = _resolve_checkpoint(checkpoint_name)
+    if target_info is not None and (
+        target_info is current_info or target_info.filename == current_info.filename
+    ):
+        logger.debug("Model already loaded (resolved match), no switch needed")
+        return True
+
+    return False
 
 
 def switch_model_if_needed(checkpoint_name: str) -> bool:
@@ -87,51 +210,86 @@ def switch_model_if_needed(checkpoint_name: str) -> bool:
     Returns:
         True if model was switched, False if already loaded or switch failed
     """
-    from modules import shared, sd_models
 
     if not checkpoint_name:
         return False
 
-    # Get current loaded model name
-    current_model = None
-    if shared.sd_model and hasattr(shared.sd_model, 'sd_checkpoint_info') and shared.sd_model.sd_checkpoint_info:
-        current_model = shared.sd_model.sd_checkpoint_info.name_for_extra
-        if not current_model:
-            current_model = shared.sd_model.sd_checkpoint_info.name
-
-    print(f"[TaskScheduler] Current model: {current_model}")
-    print(f"[TaskScheduler] Target model: {checkpoint_name}")
-
-    # Check if we need to switch
-    if current_model and checkpoint_name in current_model:
-        print(f"[TaskScheduler] Model already loaded, no switch needed")
-        return False
-
-    # Also check the other way (in case checkpoint_name is a substring or vice versa)
-    if current_model and current_model in checkpoint_name:
-        print(f"[TaskScheduler] Model already loaded (reverse match), no switch needed")
+    if _is_checkpoint_loaded(checkpoint_name):
         return False
 
     # Find the checkpoint info
-    checkpoint_info = sd_models.get_closet_checkpoint_match(checkpoint_name)
+    checkpoint_info = _resolve_checkpoint(checkpoint_name)
     if not checkpoint_info:
-        print(f"[TaskScheduler] WARNING: Checkpoint not found: {checkpoint_name}")
+        logger.warning("Checkpoint not found: %s", checkpoint_name)
         return False
 
-    print(f"[TaskScheduler] Switching model to: {checkpoint_info.name}")
+    logger.info("Switching model to: %s", checkpoint_info.name)
 
     try:
         # Reload model weights
         sd_models.reload_model_weights(info=checkpoint_info)
-        print(f"[TaskScheduler] Model switched successfully")
+        logger.info("Model switched successfully")
         return True
     except Exception as e:
-        print(f"[TaskScheduler] Failed to switch model: {e}")
+        logger.warning("Failed to switch model: %s", e)
         import traceback
         traceback.print_exc()
         return False
 
 
+# Marks a setting that had no stored value (opts.data falls back to the default)
+_OPTS_MISSING = object()
+
+# Settings temporary_settings_override() sets with setattr and then applies
+# itself (model/VAE reloads). Other settings with an onchange handler go
+# through Options.set, which validates them and runs the handler; settings
+# without one are read and written on opts.data directly.
+_SETTER_KEYS = frozenset(("sd_model_checkpoint", "sd_vae", "forge_additional_modules"))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_refresh_model_loading_parameters() -> Optional[Callable]:
+    """Forge's refresh_model_loading_parameters, or None if unavailable (looked up once)."""
+    try:
+        from modules_forge.main_entry import refresh_model_loading_parameters
+        return refresh_model_loading_parameters
+    except ImportError:
+        return None
+
+
+def _modules_key(modules) -> tuple:
+    """Normalize a forge_additional_modules value for comparison."""
+    return tuple(map(str, modules or ()))
+
+
+def _apply_forge_modules(modules: list, reason: str, reload: bool = True) -> None:
+    """
+    Set forge_additional_modules and reload the model so the VAE change takes effect.
+
+    Args:
+        modules: The new forge_additional_modules list.
+        reason: What the reload is for, used in the log message.
+        reload: Reload the model now. False when a checkpoint switch follows,
+                which loads the new modules along with the new weights.
+    """
+
+    setattr(shared.opts, "forge_additional_modules", modules)
+    logger.debug("Set forge_additional_modules: %s", modules)
+
+    # Call Forge's refresh function to update model_data.forge_loading_parameters
+    # This is required for Forge to actually use the new VAE setting
+    refresh = _get_refresh_model_loading_parameters()
+    if refresh is not None:
+        refresh()
+    else:
+        logger.warning("Could not import refresh_model_loading_parameters")
+
+    # Force model reload to apply new VAE (or clear VAE if empty)
+    if reload and shared.sd_model and hasattr(shared.sd_model, 'sd_checkpoint_info'):
+        logger.info("Reloading model to %s...", reason)
+        sd_models.reload_model_weights(info=shared.sd_model.sd_checkpoint_info)
+
+
 @contextmanager
 def temporary_settings_override(override_settings: dict):
     """
@@ -143,92 +301,100 @@ def temporary_settings_override(override_settings: dict):
     Note: sd_model_checkpoint is EXCLUDED here - model switching is handled
     separately via switch_model_if_needed() to ensure it actually loads.
     """
-    from modules import shared
 
     if not override_settings:
         yield
         return
 
-    # Exclude sd_model_checkpoint - model switching handled separately
-    settings_to_apply = {k: v for k, v in override_settings.items() if k != "sd_model_checkpoint"}
+    opts = shared.opts
+    opts_data = opts.data
+    data_labels = opts.data_labels
+    # The lists of applied/restored keys are only built for the debug log
+    debug = logger.isEnabledFor(logging.DEBUG)
 
-    # Save original values
+    # Save original values (only for settings Forge knows about)
     original_values = {}
-    for key in settings_to_apply:
-        if hasattr(shared.opts, key):
-            original_values[key] = getattr(shared.opts, key)
+    onchange_keys = set()
+    for key in override_settings:
+        if key == "sd_model_checkpoint":
+            continue  # Model switching handled separately
+        if key in _SETTER_KEYS:
+            if hasattr(opts, key):
+                original_values[key] = getattr(opts, key)
+        elif key in opts_data or key in data_labels:
+            original_values[key] = opts_data.get(key, _OPTS_MISSING)
+            if getattr(data_labels.get(key), "onchange", None) is not None:
+                onchange_keys.add(key)
 
     # Always save forge_additional_modules so we can restore VAE after task
     # (even if task doesn't specify it, we might clear the UI's VAE)
     if "forge_additional_modules" not in original_values:
         original_values["forge_additional_modules"] = getattr(shared.opts, "forge_additional_modules", [])
 
-    print(f"[TaskScheduler] Saved {len(original_values)} original settings")
+    logger.debug("Saved %s original settings", len(original_values))
 
     # Apply new settings before task execution
     applied = []
-    for key, value in settings_to_apply.items():
+    for key, value in override_settings.items():
+        if key not in original_values:
+            continue
         try:
-            if hasattr(shared.opts, key):
-                setattr(shared.opts, key, value)
+            if key in _SETTER_KEYS:
+                setattr(opts, key, value)
+            elif key in onchange_keys:
+                opts.set(key, value)
+            else:
+                opts_data[key] = value
+            if debug:
                 applied.append(key)
         except Exception as e:
-            print(f"[TaskScheduler] Failed to apply setting '{key}': {e}")
+            logger.warning("Failed to apply setting '%s': %s", key, e)
 
     if applied:
-        print(f"[TaskScheduler] Applied {len(applied)} settings: {applied}")
+        logger.debug("Applied %s settings: %s", len(applied), applied)
 
     # Handle VAE switch if needed
     # For Forge, VAE is in forge_additional_modules; for standard A1111, it's in sd_vae
-    forge_modules = settings_to_apply.get("forge_additional_modules")
-    sd_vae_setting = settings_to_apply.get("sd_vae")
+    forge_modules = override_settings.get("forge_additional_modules")
+    sd_vae_setting = override_settings.get("sd_vae")
 
     # Forge-style VAE handling
     # If forge_additional_modules is in settings, use it (could be empty list to clear VAE)
     # If forge_additional_modules is NOT in settings, task was created without VAE - clear it
+    # original_values holds the modules that were loaded before any change above
+    original_modules = original_values["forge_additional_modules"]
+    target_modules = (forge_modules or []) if "forge_additional_modules" in override_settings else []
+    if "forge_additional_modules" not in override_settings and original_modules:
+        logger.debug("Task has no VAE, clearing UI's VAE")
+
+    # Modules the model is loaded with while the task runs
+    task_modules = original_modules
     try:
-        current_modules = getattr(shared.opts, "forge_additional_modules", [])
-
-        if "forge_additional_modules" in settings_to_apply:
-            # Task has explicit VAE setting (could be empty list or list with VAE path)
-            target_modules = forge_modules if forge_modules else []
-        else:
-            # Task doesn't have forge_additional_modules - means no VAE was selected
-            target_modules = []
-            if current_modules:
-                print(f"[TaskScheduler] Task has no VAE, clearing UI's VAE")
-
-        if list(target_modules) != list(current_modules):
-            setattr(shared.opts, "forge_additional_modules", target_modules)
-            print(f"[TaskScheduler] Set forge_additional_modules: {target_modules}")
-
-            # Call Forge's refresh function to update model_data.forge_loading_parameters
-            # This is required for Forge to actually use the new VAE setting
-            try:
-                from modules_forge.main_entry import refresh_model_loading_parameters
-                refresh_model_loading_parameters()
-                print(f"[TaskScheduler] Refreshed Forge loading parameters")
-            except ImportError:
-                print(f"[TaskScheduler] Could not import refresh_model_loading_parameters")
-
-            # Force model reload to apply new VAE (or clear VAE if empty)
-            from modules import sd_models
-            if shared.sd_model and hasattr(shared.sd_model, 'sd_checkpoint_info'):
-                print(f"[TaskScheduler] Reloading model to apply VAE change...")
-                sd_models.reload_model_weights(info=shared.sd_model.sd_checkpoint_info)
+        if _modules_key(target_modules) != _modules_key(original_modules):
+            # If the task switches checkpoints, that load picks up the new
+            # modules too, so don't reload the current model for them first
+            checkpoint = override_settings.get("sd_model_checkpoint")
+            switch_pending = (
+                bool(checkpoint)
+                and not _is_checkpoint_loaded(checkpoint)
+                and _resolve_checkpoint(checkpoint) is not None
+            )
+            if switch_pending:
+                logger.debug("Checkpoint switch pending, VAE change is applied with it")
+            _apply_forge_modules(target_modules, "apply VAE change", reload=not switch_pending)
+            task_modules = target_modules
         else:
-            print(f"[TaskScheduler] forge_additional_modules unchanged, skipping reload")
+            logger.debug("forge_additional_modules unchanged, skipping reload")
     except Exception as e:
-        print(f"[TaskScheduler] Failed to handle forge_additional_modules: {e}")
+        logger.warning("Failed to handle forge_additional_modules: %s", e)
 
     if sd_vae_setting and sd_vae_setting not in ("Automatic", "None", ""):
         # Standard A1111-style VAE reload
         try:
-            from modules import sd_vae
             sd_vae.reload_vae_weights()
-            print(f"[TaskScheduler] Reloaded VAE: {sd_vae_setting}")
+            logger.debug("Reloaded VAE: %s", sd_vae_setting)
         except Exception as e:
-            print(f"[TaskScheduler] Failed to reload VAE: {e}")
+            logger.warning("Failed to reload VAE: %s", e)
 
     try:
         yield
@@ -237,48 +403,116 @@ def temporary_settings_override(override_settings: dict):
         restored = []
         for key, value in original_values.items():
             try:
-                setattr(shared.opts, key, value)
-                restored.append(key)
+                if key in _SETTER_KEYS:
+                    setattr(opts, key, value)
+                elif key in onchange_keys:
+                    # A setting that had no stored value runs its handler with
+                    # the default, then falls back to it as before
+                    opts.set(key, data_labels[key].default if value is _OPTS_MISSING else value)
+                    if value is _OPTS_MISSING:
+                        opts_data.pop(key, None)
+                elif value is _OPTS_MISSING:
+                    opts_data.pop(key, None)
+                else:
+                    opts_data[key] = value
+                if debug:
+                    restored.append(key)
             except Exception as e:
-                print(f"[TaskScheduler] Failed to restore setting '{key}': {e}")
+                logger.warning("Failed to restore setting '%s': %s", key, e)
 
         if restored:
-            print(f"[TaskScheduler] Restored {len(restored)} settings: {restored}")
+            logger.debug("Restored %s settings: %s", len(restored), restored)
 
         # Restore VAE if it was changed
         # For Forge, restore forge_additional_modules; for A1111, reload sd_vae
         if "forge_additional_modules" in original_values:
             try:
-                current_modules = getattr(shared.opts, "forge_additional_modules", [])
-                original_modules = original_values["forge_additional_modules"]
-                if list(original_modules) != list(current_modules):
-                    setattr(shared.opts, "forge_additional_modules", original_modules)
-                    print(f"[TaskScheduler] Restored forge_additional_modules: {original_modules}")
-
-                    # Call Forge's refresh function to update model_data.forge_loading_parameters
-                    try:
-                        from modules_forge.main_entry import refresh_model_loading_parameters
-                        refresh_model_loading_parameters()
-                    except ImportError:
-                        pass
-
-                    # Force model reload to restore original VAE
-                    from modules import sd_models
-                    if shared.sd_model and hasattr(shared.sd_model, 'sd_checkpoint_info'):
-                        print(f"[TaskScheduler] Reloading model to restore VAE...")
-                        sd_models.reload_model_weights(info=shared.sd_model.sd_checkpoint_info)
+                # The loop above already put the setting back; the model
+                # still has the task's modules loaded until it's reloaded
+                if _modules_key(original_modules) != _modules_key(task_modules):
+                    _apply_forge_modules(original_modules, "restore VAE")
             except Exception as e:
-                print(f"[TaskScheduler] Failed to restore forge_additional_modules: {e}")
+                logger.warning("Failed to restore forge_additional_modules: %s", e)
         elif "sd_vae" in original_values:
             try:
-                from modules import sd_vae
                 sd_vae.reload_vae_weights()
-                print(f"[TaskScheduler] Restored VAE: {original_values['sd_vae']}")
+                logger.debug("Restored VAE: %s", original_values['sd_vae'])
             except Exception as e:
-                print(f"[TaskScheduler] Failed to restore VAE: {e}")
+                logger.warning("Failed to restore VAE: %s", e)
+
+
+def collect_saved_images(processed) -> list[str]:
+    """Get the paths Forge saved a Processed result's images to."""
+    return [path for path in (getattr(img, 'already_saved_as', None) for img in processed.images) if path]
+
 
+# Shared result for tasks with nothing to override. Never mutated.
+_EMPTY: dict = {}
 
-def get_default_script_args(script_runner) -> list[Any]:
+
+def build_override_settings(task: Task) -> dict:
+    """
+    Build a task's override_settings: UI settings first, then model overrides
+    on top, then the task's checkpoint.
+
+    Args:
+        task: The task being executed.
+
+    Returns:
+        A new dict, used both for the processing object and for
+        temporary_settings_override() (which skips sd_model_checkpoint).
+        Tasks with nothing to override get the shared _EMPTY instead, which
+        callers must treat as read-only; the processing object gets a copy
+        from _processing_override_settings().
+    """
+    params = task.params
+    ui_settings = params.get("ui_settings") or {}
+    model_overrides = params.get("override_settings") or {}
+
+    if ui_settings:
+        logger.debug("Applying %s UI settings: %s", len(ui_settings), list(ui_settings))
+    if model_overrides:
+        logger.debug("Applying %s model overrides: %s", len(model_overrides), list(model_overrides))
+
+    if not (ui_settings or model_overrides or task.checkpoint):
+        return _EMPTY
+
+    override_settings = {**ui_settings, **model_overrides}
+    if task.checkpoint:
+        override_settings["sd_model_checkpoint"] = task.checkpoint
+    return override_settings
+
+
+def _processing_override_settings(override_settings: dict) -> dict:
+    """
+    Get the override_settings to give the processing object.
+
+    Leaves out sd_model_checkpoint when that model is already loaded, so
+    process_images() doesn't run its checkpoint-change path for a model
+    that is resident. switch_model_if_needed() still runs before each task.
+
+    Always returns a new dict: Forge and extensions treat p.override_settings
+    as per-run state and may write into it, and the input may be the shared
+    _EMPTY.
+    """
+    checkpoint = override_settings.get("sd_model_checkpoint")
+    if checkpoint and _is_checkpoint_loaded(checkpoint):
+        return {key: value for key, value in override_settings.items() if key != "sd_model_checkpoint"}
+    return dict(override_settings)
+
+
+# Script runner -> (inputs list, its length, defaults). The components are
+# created once during UI setup, so their defaults are read once per runner;
+# a rebuilt or extended inputs list invalidates the entry.
+_script_defaults_cache: "weakref.WeakKeyDictionary[Any, tuple]" = weakref.WeakKeyDictionary()
+
+
+def invalidate_script_defaults_cache(*args, **kwargs) -> None:
+    """Drop cached script defaults (e.g. before the UI is rebuilt)."""
+    _script_defaults_cache.clear()
+
+
+def get_default_script_args(script_runner) -> tuple:
     """
     Get default script args for all scripts from the script runner.
 
@@ -286,17 +520,20 @@ def get_default_script_args(script_runner) -> list[Any]:
     during Gradio setup. Each alwayson script expects its arguments at
     specific positions in the script_args list.
     """
-    if not hasattr(script_runner, 'inputs') or not script_runner.inputs:
-        return []
-
-    defaults = []
-    for comp in script_runner.inputs:
-        # Get the default/current value from the Gradio component
-        if hasattr(comp, 'value'):
-            defaults.append(comp.value)
-        else:
-            defaults.append(None)
+    inputs = getattr(script_runner, 'inputs', None)
+    if not inputs:
+        return ()
+
+    cached = _script_defaults_cache.get(script_runner)
+    if cached is not None and cached[0] is inputs and cached[1] == len(inputs):
+        return cached[2]
 
+    # Get the default/current value from each Gradio component
+    defaults = tuple(getattr(comp, 'value', None) for comp in inputs)
+    try:
+        _script_defaults_cache[script_runner] = (inputs, len(inputs), defaults)
+    except TypeError:
+        pass  # Runner can't be weakly referenced; just don't cache
     return defaults
 
 
@@ -312,45 +549,50 @@ def merge_script_args_with_defaults(script_args: list, script_runner) -> list[An
     defaults = get_default_script_args(script_runner)
 
     if not script_args:
-        return defaults
+        return list(defaults)
 
-    # Try to import ControlNet helper for deserialization
-    deserialize_arg = None
-    try:
-        from task_scheduler.controlnet_helper import deserialize_script_arg
-        deserialize_arg = deserialize_script_arg
-    except ImportError:
-        pass
-
-    # Ensure we have enough args
-    result = list(script_args)
-    while len(result) < len(defaults):
-        result.append(None)
-
-    # Process args: deserialize ControlNet units and replace None with defaults
-    replaced_count = 0
-    deserialized_count = 0
-    for i in range(len(result)):
-        # Try to deserialize ControlNet units first
-        if deserialize_arg is not None and isinstance(result[i], dict):
-            if result[i].get('_is_controlnet_unit'):
-                deserialized = deserialize_arg(result[i])
-                if deserialized is not None:
-                    result[i] = deserialized
-                    deserialized_count += 1
-                    continue
-
-        # Replace None values with defaults
-        if result[i] is None and i < len(defaults) and defaults[i] is not None:
-            result[i] = defaults[i]
-            replaced_count += 1
-
-    if replaced_count > 0:
-        print(f"[TaskScheduler] Replaced {replaced_count} None script_args with defaults")
-    if deserialized_count > 0:
-        print(f"[TaskScheduler] Deserialized {deserialized_count} ControlNet units")
-
-    return result
+    # Deserialize ControlNet units that were serialized
+    def restore(arg):
+        if isinstance(arg, dict) and arg.get('_is_controlnet_unit'):
+            unit = deserialize_controlnet_unit(arg)
+            if unit is not None:
+                return unit
+        return arg
+
+    script_args = [restore(arg) for arg in script_args]
+
+    # Nothing to fill in: every position is covered and none is None. Checked
+    # by identity, since `None in script_args` would compare arrays with ==.
+    if len(script_args) >= len(defaults) and not any(arg is None for arg in script_args):
+        return script_args
+
+    # Pad to the defaults' length and replace None values with defaults
+    return [default if arg is None else arg for arg, default in zip_longest(script_args, defaults)]
+
+
+# Runs status callbacks off the executor thread, so slow listeners never hold
+# it up. One worker keeps callbacks in the order the status changes happened.
+_status_pool: Optional[ThreadPoolExecutor] = None
+_status_pool_lock = threading.Lock()
+
+
+def _get_status_pool() -> ThreadPoolExecutor:
+    """Get the status callback pool, creating it on first use."""
+    global _status_pool
+    if _status_pool is None:
+        with _status_pool_lock:
+            if _status_pool is None:
+                _status_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TaskSchedulerStatus")
+    return _status_pool
+
+
+def _run_status_callbacks(callbacks: tuple, status: str) -> None:
+    """Call each status callback, logging (not raising) their errors."""
+    for callback in callbacks:
+        try:
+            callback(status)
+        except Exception as e:
+            logger.warning("Status callback error: %s", e)
 
 
 class TaskExecutor:
@@ -358,33 +600,29 @@ class TaskExecutor:
     Executes queued tasks in the background.
 
     Uses Forge's main_thread mechanism for GPU-safe execution.
+    Use get_executor() for the shared instance.
     """
 
-    _instance: Optional["TaskExecutor"] = None
-    _lock = threading.Lock()
-
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+    # Backoff while Forge is busy with another generation: start short so the
+    # queue picks up right after it, double up to the cap while it lasts
+    BUSY_WAIT_MIN = 0.05
+    BUSY_WAIT_MAX = 1.0
+    BUSY_CACHE_TTL = 0.1
 
     def __init__(self):
-        if self._initialized:
-            return
-
         self._queue: QueueManager = get_queue_manager()
         self._is_running = False
         self._is_paused = False
         self._is_stopping = False  # True when stop requested, waiting for task to finish
+        self._pause_with_state = False  # True when the current pause saves state mid-task
+        self._busy_until = 0.0  # monotonic time until which Forge is assumed busy
         self._status_text = ""  # Current status text for UI display
         self._current_task: Optional[Task] = None
+        self._current_task_dict: Optional[tuple[Task, dict]] = None  # (task, its to_dict()) for get_status()
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
-        self._status_callbacks: list[Callable] = []
-        self._initialized = True
+        self._wake_event = threading.Event()  # Set by pause/resume/stop to end a wait early
+        self._status_callbacks: dict[Callable, None] = {}  # Ordered set of callbacks
 
     @property
     def is_running(self) -> bool:
@@ -426,7 +664,7 @@ class TaskExecutor:
         self._thread.start()
 
         self._notify_status("started")
-        print("[TaskScheduler] Queue processing started")
+        logger.info("Queue processing started")
         return True
 
     def stop(self) -> None:
@@ -442,18 +680,18 @@ class TaskExecutor:
         self._is_stopping = True
         self._is_running = False
         self._stop_event.set()
+        self._wake_event.set()
 
         # Notify UI that we're stopping
         self._notify_status("stopping")
-        print("[TaskScheduler] Stopping queue processing...")
+        logger.info("Stopping queue processing...")
 
         # Interrupt the current generation
         try:
-            from modules import shared
             shared.state.interrupt()
-            print("[TaskScheduler] Sent interrupt signal to Forge")
+            logger.info("Sent interrupt signal to Forge")
         except Exception as e:
-            print(f"[TaskScheduler] Failed to send interrupt: {e}")
+            logger.warning("Failed to send interrupt: %s", e)
 
     def pause(self) -> None:
         """
@@ -463,33 +701,37 @@ class TaskExecutor:
         - Simple mode (default): Wait for current task to complete, then pause
         - Advanced mode: Wait for current image to complete, save state for resume
         """
-        from modules import shared
 
         self._is_paused = True
+        self._wake_event.set()
 
         # Check if advanced pause mode is enabled
         pause_with_state = getattr(shared.opts, 'task_scheduler_pause_with_state_saving', False)
 
+        self._pause_with_state = False
         if pause_with_state and self._current_task is not None:
             # Advanced mode: signal Forge to stop after current image
             try:
                 shared.state.stop_generating()
+                self._pause_with_state = True
                 self._notify_status("pausing_image")
-                print("[TaskScheduler] Pausing after current image (state saving enabled)")
+                logger.info("Pausing after current image (state saving enabled)")
             except Exception as e:
-                print(f"[TaskScheduler] Failed to call stop_generating: {e}")
+                logger.warning("Failed to call stop_generating: %s", e)
                 self._notify_status("pausing_task")
         else:
             # Simple mode: just wait for current task to complete
             self._notify_status("pausing_task")
-            print("[TaskScheduler] Pausing after current task completes")
+            logger.info("Pausing after current task completes")
 
     def resume(self) -> None:
         """Resume processing."""
         self._is_paused = False
+        self._pause_with_state = False
         self._status_text = ""  # Clear pausing status
+        self._wake_event.set()
         self._notify_status("resumed")
-        print("[TaskScheduler] Queue processing resumed")
+        logger.info("Queue processing resumed")
 
     def run_single_task(self, task_id: str) -> None:
         """
@@ -515,91 +757,110 @@ class TaskExecutor:
 
         thread = threading.Thread(target=run_task, daemon=True)
         thread.start()
-        print(f"[TaskScheduler] Running single task: {task.get_display_name()}")
+        logger.info("Running single task: %s", task.get_display_name())
 
     def _run_loop(self) -> None:
         """Main execution loop running in background thread."""
-        from modules import shared
 
-        print("[TaskScheduler] Executor run loop started")
-        loop_count = 0
+        logger.debug("Executor run loop started")
+        busy_wait = 0.0
         while self._is_running and not self._stop_event.is_set():
-            loop_count += 1
-
-            # Check if paused
+            # Check if paused (resume/stop wake the wait)
             if self._is_paused:
-                time.sleep(0.5)
+                self._wait(5.0)
                 continue
 
             # Check if Forge is busy with another generation
             if self._is_forge_busy():
-                if loop_count % 10 == 1:  # Log every 10 iterations
-                    print("[TaskScheduler] Waiting - Forge is busy")
-                time.sleep(1.0)
+                if not busy_wait:
+                    logger.debug("Waiting - Forge is busy")
+                busy_wait = min(max(busy_wait * 2, self.BUSY_WAIT_MIN), self.BUSY_WAIT_MAX)
+                self._wait(busy_wait)
                 continue
+            busy_wait = 0.0
 
             # First check for paused tasks that need resuming (advanced mode)
             paused_task = self._queue.get_paused_task()
             if paused_task is not None:
-                print(f"[TaskScheduler] Resuming paused task: {paused_task.id}")
+                logger.info("Resuming paused task: %s", paused_task.id)
                 # Adjust n_iter for remaining iterations
                 remaining_iter = paused_task.original_n_iter - paused_task.completed_iterations
                 if remaining_iter > 0:
                     paused_task.params["n_iter"] = remaining_iter
-                    print(f"[TaskScheduler] Resuming with {remaining_iter} remaining iterations")
+                    paused_task.invalidate_serialized("params")
+                    logger.debug("Resuming with %s remaining iterations", remaining_iter)
                 self._execute_task(paused_task)
                 continue
 
-            # Get next pending task
-            task = self._queue.get_next_task()
+            # Take the next pending task (marked running in the same step)
+            task = self._queue.claim_next_task()
             if task is None:
                 # No pending tasks - stop the executor
                 # User must click "Start Queue" again to process new tasks
-                print("[TaskScheduler] No pending tasks, stopping executor")
+                logger.info("No pending tasks, stopping executor")
                 break
 
-            print(f"[TaskScheduler] Found task to execute: {task.id}")
+            logger.debug("Found task to execute: %s", task.id)
             # Execute the task
-            self._execute_task(task)
+            self._execute_task(task, mark_running=False)
 
-        print("[TaskScheduler] Executor run loop ended")
+        logger.debug("Executor run loop ended")
         self._is_running = False
         self._is_stopping = False  # Reset stopping flag
         self._current_task = None
         self._notify_status("finished")
 
+    def _wait(self, timeout: float) -> None:
+        """Sleep for up to timeout seconds, returning early on pause/resume/stop."""
+        self._wake_event.wait(timeout)
+        self._wake_event.clear()
+
     def _is_forge_busy(self) -> bool:
         """Check if Forge is currently running a generation."""
+        # A busy result is reused briefly; generations last much longer than
+        # that. Not-busy is always re-read, so we never start over a new job.
+        now = time.monotonic()
+        if now < self._busy_until:
+            return True
+
         try:
-            from modules import shared
+            state = shared.state
 
             # Check multiple indicators of active generation
-            job_count = shared.state.job_count
-            job = shared.state.job
+            job_count = state.job_count
+            job = state.job
 
             # Only busy if there's an active job name set
             # job_count alone can be stale
-            is_busy = bool(job) and job_count > 0
+            is_busy = job_count > 0 and bool(job)
 
             if is_busy:
-                print(f"[TaskScheduler] Forge busy: job='{job}', job_count={job_count}")
+                self._busy_until = now + self.BUSY_CACHE_TTL
+                logger.debug("Forge busy: job='%s', job_count=%s", job, job_count)
 
             return is_busy
         except Exception as e:
-            print(f"[TaskScheduler] Error checking Forge busy state: {e}")
+            logger.warning("Error checking Forge busy state: %s", e)
             return False
 
-    def _execute_task(self, task: Task) -> None:
-        """Execute a single task."""
-        from modules import shared
+    def _execute_task(self, task: Task, mark_running: bool = True) -> None:
+        """
+        Execute a single task.
+
+        Args:
+            task: The task to run.
+            mark_running: Set the task's status to running first. False when
+                the task was already claimed as running.
+        """
 
         self._current_task = task
         task_id = task.id
 
         try:
             # Mark as running
-            self._queue.set_task_running(task_id)
-            print(f"[TaskScheduler] Starting task: {task.get_display_name()}")
+            if mark_running:
+                self._queue.set_task_running(task_id)
+            logger.info("Starting task: %s", task.get_display_name())
 
             # Execute based on task type
             if task.task_type == TaskType.TXT2IMG:
@@ -617,12 +878,13 @@ class TaskExecutor:
                 # Task was interrupted by Stop button
                 self._queue.set_task_stopped(task_id, result_images, result_info)
                 self._notify_status("stopped")
-                print(f"[TaskScheduler] Task stopped: {task.get_display_name()}")
+                logger.info("Task stopped: %s", task.get_display_name())
                 self._is_stopping = False  # Reset the flag
             elif self._is_paused and was_stopped_generating:
-                # Advanced pause mode: task was paused mid-execution
-                pause_with_state = getattr(shared.opts, 'task_scheduler_pause_with_state_saving', False)
-                if pause_with_state:
+                # Advanced pause mode: task was paused mid-execution.
+                # Uses the mode pause() acted on, not a fresh read of the
+                # setting, which may have been toggled since.
+                if self._pause_with_state:
                     # Calculate completed iterations from results
                     # Each iteration produces batch_size images
                     batch_size = task.params.get("batch_size", 1)
@@ -637,16 +899,16 @@ class TaskExecutor:
                         result_info=result_info
                     )
                     self._notify_status("paused")
-                    print(f"[TaskScheduler] Task paused: {task.get_display_name()} ({completed_iter}/{original_iter} iterations)")
+                    logger.info("Task paused: %s (%s/%s iterations)", task.get_display_name(), completed_iter, original_iter)
                 else:
                     # Simple pause mode - task completed normally
                     self._queue.set_task_completed(task_id, result_images, result_info)
                     self._notify_status("paused")
-                    print(f"[TaskScheduler] Task completed, queue paused: {task.get_display_name()}")
+                    logger.info("Task completed, queue paused: %s", task.get_display_name())
             else:
                 # Normal completion
                 self._queue.set_task_completed(task_id, result_images, result_info)
-                print(f"[TaskScheduler] Completed task: {task.get_display_name()}")
+                logger.info("Completed task: %s", task.get_display_name())
 
         except Exception as e:
             # Check if this was an interrupt that manifested as an exception
@@ -654,46 +916,29 @@ class TaskExecutor:
                 # Get any partial results
                 self._queue.set_task_stopped(task_id, [], "")
                 self._notify_status("stopped")
-                print(f"[TaskScheduler] Task stopped (exception): {task.get_display_name()}")
+                logger.info("Task stopped (exception): %s", task.get_display_name())
                 self._is_stopping = False
             else:
+                import traceback
                 error_msg = f"{str(e)}\n{traceback.format_exc()}"
                 self._queue.set_task_failed(task_id, error_msg)
-                print(f"[TaskScheduler] Task failed: {task.get_display_name()}")
-                print(f"[TaskScheduler] Error: {e}")
+                logger.warning("Task failed: %s", task.get_display_name())
+                logger.warning("Error: %s", e)
 
         finally:
             self._current_task = None
+            self._current_task_dict = None
 
     def _execute_txt2img(self, task: Task) -> tuple[list[str], str]:
         """Execute a txt2img task."""
-        from modules import scripts, shared
-        from modules.processing import process_images
-        from modules_forge import main_thread
-        from .param_capture import get_restore_strategy
-
         params = task.params
-
-        # Build override_settings: UI settings first, then model overrides on top
-        ui_settings = params.get("ui_settings", {})
-        model_overrides = params.get("override_settings", {})
-
-        override_settings = ui_settings.copy() if ui_settings else {}
-        if ui_settings:
-            print(f"[TaskScheduler] Applying {len(ui_settings)} UI settings: {list(ui_settings.keys())}")
-
-        if model_overrides:
-            override_settings.update(model_overrides)
-            print(f"[TaskScheduler] Applying {len(model_overrides)} model overrides: {list(model_overrides.keys())}")
-
-        if task.checkpoint:
-            override_settings["sd_model_checkpoint"] = task.checkpoint
+        override_settings = build_override_settings(task)
 
         # Use context managers to ensure settings are restored after execution
         with temporary_settings_override(override_settings), output_subfolder_override():
             # Get restore strategy and create processing object
             restore_strategy = get_restore_strategy(task.capture_format)
-            p = restore_strategy.create_txt2img(params, override_settings)
+            p = restore_strategy.create_txt2img(params, _processing_override_settings(override_settings))
 
             # Get script_args from task (will be merged with defaults on main thread)
             task_script_args = task.script_args if task.script_args else []
@@ -721,43 +966,18 @@ class TaskExecutor:
             # Clear progress
             shared.total_tqdm.clear()
 
-            # Collect results
-            result_images = []
-            for img in processed.images:
-                if hasattr(img, 'already_saved_as') and img.already_saved_as:
-                    result_images.append(img.already_saved_as)
-
-            return result_images, processed.info if processed.info else ""
+            return collect_saved_images(processed), processed.info or ""
 
     def _execute_img2img(self, task: Task) -> tuple[list[str], str]:
         """Execute an img2img task."""
-        from modules import scripts, shared
-        from modules.processing import process_images
-        from modules_forge import main_thread
-        from .param_capture import get_restore_strategy
-
         params = task.params
-
-        # Build override_settings: UI settings first, then model overrides on top
-        ui_settings = params.get("ui_settings", {})
-        model_overrides = params.get("override_settings", {})
-
-        override_settings = ui_settings.copy() if ui_settings else {}
-        if ui_settings:
-            print(f"[TaskScheduler] Applying {len(ui_settings)} UI settings: {list(ui_settings.keys())}")
-
-        if model_overrides:
-            override_settings.update(model_overrides)
-            print(f"[TaskScheduler] Applying {len(model_overrides)} model overrides: {list(model_overrides.keys())}")
-
-        if task.checkpoint:
-            override_settings["sd_model_checkpoint"] = task.checkpoint
+        override_settings = build_override_settings(task)
 
         # Use context managers to ensure settings are restored after execution
         with temporary_settings_override(override_settings), output_subfolder_override():
             # Get restore strategy and create processing object
             restore_strategy = get_restore_strategy(task.capture_format)
-            p = restore_strategy.create_img2img(params, override_settings)
+            p = restore_strategy.create_img2img(params, _processing_override_settings(override_settings))
 
             # Get script_args from task (will be merged with defaults on main thread)
             task_script_args = task.script_args if task.script_args else []
@@ -785,46 +1005,61 @@ class TaskExecutor:
             # Clear progress
             shared.total_tqdm.clear()
 
-            # Collect results
-            result_images = []
-            for img in processed.images:
-                if hasattr(img, 'already_saved_as') and img.already_saved_as:
-                    result_images.append(img.already_saved_as)
-
-            return result_images, processed.info if processed.info else ""
+            return collect_saved_images(processed), processed.info or ""
 
     def register_status_callback(self, callback: Callable) -> None:
-        """Register a callback for executor status changes."""
-        if callback not in self._status_callbacks:
-            self._status_callbacks.append(callback)
+        """
+        Register a callback for executor status changes.
+
+        Callbacks run on a separate worker thread, in the order the status
+        changes happened.
+        """
+        self._status_callbacks.setdefault(callback, None)
 
     def unregister_status_callback(self, callback: Callable) -> None:
         """Unregister a status callback."""
-        if callback in self._status_callbacks:
-            self._status_callbacks.remove(callback)
+        self._status_callbacks.pop(callback, None)
 
     def _notify_status(self, status: str) -> None:
         """Notify callbacks of status change."""
         self._status_text = status  # Store for API access
-        for callback in self._status_callbacks:
-            try:
-                callback(status)
-            except Exception as e:
-                print(f"[TaskScheduler] Status callback error: {e}")
+        # Hand a snapshot to the callback pool so callbacks may (un)register
+        # from any thread and can't block the executor
+        if self._status_callbacks:
+            _get_status_pool().submit(_run_status_callbacks, tuple(self._status_callbacks), status)
 
     def get_status(self) -> dict:
         """Get current executor status."""
+        # The running task doesn't change while it executes, so serialize it
+        # once per task rather than on every status poll
+        task = self._current_task
+        current_task = None
+        if task is not None:
+            cached = self._current_task_dict
+            if cached is None or cached[0] is not task:
+                cached = self._current_task_dict = (task, task.to_dict())
+            current_task = cached[1]
+
         return {
             "is_running": self._is_running,
             "is_paused": self._is_paused,
             "is_stopping": self._is_stopping,
             "status_text": self._status_text,
-            "current_task": self._current_task.to_dict() if self._current_task else None,
+            "current_task": current_task,
             "queue_stats": self._queue.get_stats()
         }
 
 
-# Convenience function
+# Global executor instance
+_executor_instance: Optional[TaskExecutor] = None
+_executor_instance_lock = threading.Lock()
+
+
 def get_executor() -> TaskExecutor:
     """Get the global executor instance."""
-    return TaskExecutor()
+    global _executor_instance
+    if _executor_instance is None:
+        with _executor_instance_lock:
+            if _executor_instance is None:
+                _executor_instance = TaskExecutor()
+    return _executor_instance
@@ -0,0 +1,22 @@
+"""
+Logging for the task scheduler.
+
+Messages go to stdout with the "[TaskScheduler]" prefix the extension has
+always printed. Per-task detail is logged at DEBUG and hidden by default;
+set TASK_SCHEDULER_LOG_LEVEL=DEBUG to see it.
+"""
+import logging
+import os
+import sys
+
+logger = logging.getLogger("task_scheduler")
+
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("[TaskScheduler] %(message)s"))
+    logger.addHandler(_handler)
+    # Forge configures the root logger itself; keep our output independent of it
+    logger.propagate = False
+
+    _level = os.environ.get("TASK_SCHEDULER_LOG_LEVEL", "INFO").upper()
+    logger.setLevel(_level if isinstance(logging.getLevelName(_level), int) else logging.INFO)
@@ -5,10 +5,9 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, Any
 from enum import Enum
-import json
 import uuid
 
-from .script_args_serializer import serialize_script_args, deserialize_script_args
+from .script_args_serializer import serialize_script_args, deserialize_script_args, _json_dumps, _json_loads
 
 
 class TaskStatus(str, Enum):
@@ -28,13 +27,52 @@ class TaskType(str, Enum):
     IMG2IMG = "img2img"
 
 
-@dataclass
+# JSON-encoded Task fields and their serializers. Their encoded form is cached
+# on the task and reused by to_dict() until the field is reassigned.
+_SERIALIZED_FIELDS = {
+    "params": _json_dumps,
+    "script_args": serialize_script_args,
+    "result_images": _json_dumps,
+}
+
+# Fields whose columns list views don't read. from_dict() records which of
+# them a row lacked, so saving the task leaves those stored values alone.
+_LIST_SKIPPED_FIELDS = frozenset(("script_args", "result_images", "result_info"))
+
+
+def to_epoch_ms(dt: Optional[datetime]) -> Optional[int]:
+    """Convert a datetime to integer epoch milliseconds (the stored form)."""
+    return int(dt.timestamp() * 1000) if dt else None
+
+
+def from_epoch_ms(value: Any) -> Optional[datetime]:
+    """
+    Convert a stored timestamp back to a datetime.
+
+    Accepts epoch milliseconds, or an ISO string as stored by older versions.
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return datetime.fromtimestamp(value / 1000)
+
+
+@dataclass(slots=True)
 class Task:
     """
     Represents a queued generation task.
 
     Stores all parameters needed to reproduce the exact generation,
     including the checkpoint model, prompts, settings, and extension args.
+
+    The JSON form of params/script_args/result_images is cached between
+    to_dict() calls and dropped when the field is reassigned. If one of them
+    is mutated in place instead, call invalidate_serialized() afterwards.
+
+    Tasks loaded for list views lack script_args and the results; `unloaded`
+    names those fields until they're reassigned, and update_tasks() doesn't
+    write them.
     """
     # Identity
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -76,6 +114,58 @@ class Task:
     # Capture format: None = legacy (hardcoded fields), "dynamic" = new dynamic capture
     capture_format: Optional[str] = None
 
+    # Cached JSON of the _SERIALIZED_FIELDS (not part of the task's identity)
+    _serialized: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    # Fields from _LIST_SKIPPED_FIELDS that from_dict() wasn't given
+    unloaded: frozenset = field(default=frozenset(), init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in _SERIALIZED_FIELDS:
+            # Unset while __init__ assigns the fields before it
+            cache = getattr(self, "_serialized", None)
+            if cache:
+                cache.pop(name, None)
+        if name in _LIST_SKIPPED_FIELDS:
+            # An assigned value is the one to save
+            unloaded = getattr(self, "unloaded", None)
+            if unloaded and name in unloaded:
+                object.__setattr__(self, "unloaded", unloaded - {name})
+
+    def invalidate_serialized(self, *names: str) -> None:
+        """
+        Drop cached JSON for fields that were mutated in place.
+
+        Args:
+            names: Field names to invalidate. If none are given, all are dropped.
+        """
+        if names:
+            for name in names:
+                self._serialized.pop(name, None)
+        else:
+            self._serialized.clear()
+
+    def reuse_serialized(self, source: "Task", *names: str) -> None:
+        """
+        Take source's cached JSON for fields that hold the very same objects.
+
+        Args:
+            source: Task the field values were copied from.
+            names: Field names to take the cached JSON of.
+        """
+        for name in names:
+            value = source._serialized.get(name)
+            if value is not None and getattr(self, name) is getattr(source, name):
+                self._serialized[name] = value
+
+    def _get_serialized(self, name: str) -> str:
+        """Get the JSON form of a field, serializing it only if not cached."""
+        value = self._serialized.get(name)
+        if value is None:
+            value = self._serialized[name] = _SERIALIZED_FIELDS[name](getattr(self, name))
+        return value
+
     def to_dict(self) -> dict:
         """Convert task to a dictionary for database storage."""
         return {
@@ -83,13 +173,13 @@ class Task:
             "task_type": self.task_type.value if isinstance(self.task_type, TaskType) else self.task_type,
             "status": self.status.value if isinstance(self.status, TaskStatus) else self.status,
             "priority": self.priority,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "started_at": self.started_at.isoformat() if self.started_at else None,
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
-            "params": json.dumps(self.params),
+            "created_at": to_epoch_ms(self.created_at),
+            "started_at": to_epoch_ms(self.started_at),
+            "completed_at": to_epoch_ms(self.completed_at),
+            "params": self._get_serialized("params"),
             "checkpoint": self.checkpoint,
-            "script_args": serialize_script_args(self.script_args),
-            "result_images": json.dumps(self.result_images),
+            "script_args": self._get_serialized("script_args"),
+            "result_images": self._get_serialized("result_images"),
             "result_info": self.result_info,
             "error": self.error,
             "name": self.name,
@@ -106,28 +196,31 @@ class Task:
 
         Args:
             data: Dictionary from database row
-            expand_metadata: If True, fully deserialize script_args (for info view/execution).
-                           If False, keep script_args as empty list (for task list display).
+            expand_metadata: If True, fully deserialize script_args and result_images
+                           (for info view/execution). If False, keep them as empty lists
+                           (for task list display).
         """
-        # Only deserialize script_args when needed (info view, task execution)
+        # Only deserialize script_args/result_images when needed (info view, task execution)
         if expand_metadata:
             script_args = deserialize_script_args(data.get("script_args", ""))
+            result_images = _json_loads(data["result_images"]) if data.get("result_images") else []
         else:
             script_args = []
+            result_images = []
 
-        return cls(
+        task = cls(
             id=data["id"],
             task_type=TaskType(data["task_type"]) if data.get("task_type") else TaskType.TXT2IMG,
             status=TaskStatus(data["status"]) if data.get("status") else TaskStatus.PENDING,
             priority=data.get("priority", 0),
-            created_at=datetime.fromisoformat(data["created_at"]) if data.get("created_at") else datetime.now(),
-            started_at=datetime.fromisoformat(data["started_at"]) if data.get("started_at") else None,
-            completed_at=datetime.fromisoformat(data["completed_at"]) if data.get("completed_at") else None,
-            params=json.loads(data["params"]) if data.get("params") else {},
+            created_at=from_epoch_ms(data.get("created_at")) or datetime.now(),
+            started_at=from_epoch_ms(data.get("started_at")),
+            completed_at=from_epoch_ms(data.get("completed_at")),
+            params=_json_loads(data["params"]) if data.get("params") else {},
             checkpoint=data.get("checkpoint", ""),
             script_args=script_args,
-            result_images=json.loads(data["result_images"]) if data.get("result_images") else [],
-            result_info=data.get("result_info", ""),
+            result_images=result_images,
+            result_info=data.get("result_info") or "",  # NULL when the task has no results row
             error=data.get("error"),
             name=data.get("name", ""),
             completed_iterations=data.get("completed_iterations", 0),
@@ -136,6 +229,20 @@ class Task:
             capture_format=data.get("capture_format"),
         )
 
+        # The stored JSON is the serialized form of these fields, so seed the
+        # cache with it. When the row has a field that wasn't decoded, this
+        # also means saving the task writes back the stored value.
+        for name in _SERIALIZED_FIELDS:
+            if data.get(name):
+                task._serialized[name] = data[name]
+
+        # List view rows don't include script_args or the results at all
+        unloaded = _LIST_SKIPPED_FIELDS.difference(data)
+        if unloaded:
+            object.__setattr__(task, "unloaded", unloaded)
+
+        return task
+
     def get_display_name(self) -> str:
         """Get a display name for the task."""
         if self.name:
@@ -4,20 +4,44 @@ Base classes for parameter capture and restoration.
 These abstract classes define the interface for capturing parameters from
 processing objects and restoring them during task execution.
 """
+import functools
 import json
 import os
-import uuid
+import secrets
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple
 
-from modules import shared
+from modules import scripts, shared
 from modules.processing import StableDiffusionProcessing
+from PIL import Image
 
+from ..controlnet_helper import is_controlnet_unit, serialize_script_arg
+from ..log import logger
 from ..models import TaskType
-
+from ..script_args_mapper import ArgInfo, get_cached_mapping
+
+
+# Exact types json.dumps always accepts (subclasses such as enums still get tested)
+JSON_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+# Essential settings that affect generation, always captured with the quicksettings
+ESSENTIAL_UI_SETTINGS = frozenset((
+    "sd_vae",                        # VAE
+    "CLIP_stop_at_last_layers",      # Clip Skip
+    "eta_noise_seed_delta",          # ENSD
+    "randn_source",                  # RNG source
+    "eta_ancestral",                 # Eta for ancestral samplers
+    "eta_ddim",                      # Eta for DDIM
+    "s_churn",                       # Sigma churn
+    "s_tmin",                        # Sigma tmin
+    "s_tmax",                        # Sigma tmax
+    "s_noise",                       # Sigma noise
+))
 
 # Get extension directory for temp image storage
 ext_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+temp_images_dir = os.path.join(ext_dir, "temp_images")
 
 
 class BaseParameterCapture(ABC):
@@ -44,9 +68,7 @@ class BaseParameterCapture(ABC):
         params = self._capture_core_params(p)
 
         # Capture override settings (shared logic)
-        p_override_settings = {}
-        if hasattr(p, 'override_settings') and p.override_settings:
-            p_override_settings = dict(p.override_settings)
+        p_override_settings = _copy_dict(getattr(p, 'override_settings', None))
 
         # Capture UI settings (shared logic)
         ui_settings = self._capture_ui_settings(p_override_settings)
@@ -59,12 +81,13 @@ class BaseParameterCapture(ABC):
         # Store override settings
         if p_override_settings:
             params["override_settings"] = p_override_settings
-            print(f"[TaskScheduler] Captured p.override_settings: {p_override_settings}")
+            logger.debug("Captured p.override_settings: %s", p_override_settings)
 
         # Capture extra generation params
-        if hasattr(p, 'extra_generation_params') and p.extra_generation_params:
-            params["extra_generation_params"] = dict(p.extra_generation_params)
-            print(f"[TaskScheduler] Captured extra_generation_params: {list(p.extra_generation_params.keys())}")
+        extra_generation_params = getattr(p, 'extra_generation_params', None)
+        if extra_generation_params:
+            params["extra_generation_params"] = _copy_dict(extra_generation_params)
+            logger.debug("Captured extra_generation_params: %s", list(extra_generation_params))
 
         # Get checkpoint
         checkpoint = shared.opts.sd_model_checkpoint or ""
@@ -84,79 +107,69 @@ class BaseParameterCapture(ABC):
     def _capture_ui_settings(self, p_override_settings: Dict) -> Dict:
         """Capture UI-visible settings from shared.opts."""
         try:
-            # Essential settings that affect generation
-            essential_settings = {
-                "sd_vae",                        # VAE
-                "CLIP_stop_at_last_layers",      # Clip Skip
-                "eta_noise_seed_delta",          # ENSD
-                "randn_source",                  # RNG source
-                "eta_ancestral",                 # Eta for ancestral samplers
-                "eta_ddim",                      # Eta for DDIM
-                "s_churn",                       # Sigma churn
-                "s_tmin",                        # Sigma tmin
-                "s_tmax",                        # Sigma tmax
-                "s_noise",                       # Sigma noise
-            }
-
-            # Get user's configured quicksettings
-            user_quicksettings = set()
-            if hasattr(shared.opts, 'quick_setting_list') and shared.opts.quick_setting_list:
-                user_quicksettings = set(shared.opts.quick_setting_list)
-
-            # Combine both sets
-            settings_to_capture = essential_settings | user_quicksettings
-
-            # Capture values, skip settings already in p.override_settings
+            # Combine the essential settings with the user's configured quicksettings
+            user_quicksettings = getattr(shared.opts, 'quick_setting_list', None)
+            settings_to_capture = ESSENTIAL_UI_SETTINGS.union(user_quicksettings or ())
+
+            # Capture values, skip settings already in p.override_settings.
+            # Read like Options.__getattr__ does: the stored value, else the
+            # setting's default; settings Forge doesn't know are left out.
+            opts_data = shared.opts.data
+            data_labels = shared.opts.data_labels
             captured_settings = {}
             skipped_settings = []
             for setting_name in settings_to_capture:
                 if setting_name in p_override_settings:
                     skipped_settings.append(setting_name)
-                    continue
-                if hasattr(shared.opts, setting_name):
-                    value = getattr(shared.opts, setting_name)
-                    captured_settings[setting_name] = value
+                elif setting_name in opts_data:
+                    captured_settings[setting_name] = opts_data[setting_name]
+                elif setting_name in data_labels:
+                    captured_settings[setting_name] = data_labels[setting_name].default
 
             # Capture Forge's additional_modules (contains VAE path in Forge)
             # Always capture this, even if empty - so we know to clear VAE during execution
             forge_additional_modules = getattr(shared.opts, "forge_additional_modules", [])
-            captured_settings["forge_additional_modules"] = list(forge_additional_modules) if forge_additional_modules else []
-
-            print(f"[TaskScheduler] Captured {len(captured_settings)} UI settings: {list(captured_settings.keys())}")
+            if not forge_additional_modules:
+                captured_settings["forge_additional_modules"] = []
+            elif type(forge_additional_modules) is list:
+                captured_settings["forge_additional_modules"] = forge_additional_modules[:]
+            else:
+                captured_settings["forge_additional_modules"] = list(forge_additional_modules)
+
+            logger.debug("Captured %s UI settings: %s", len(captured_settings), list(captured_settings))
             if skipped_settings:
-                print(f"[TaskScheduler] Skipped {len(skipped_settings)} UI settings (using model overrides): {skipped_settings}")
+                logger.debug("Skipped %s UI settings (using model overrides): %s", len(skipped_settings), skipped_settings)
 
             return captured_settings
         except Exception as e:
-            print(f"[TaskScheduler] Could not capture UI settings: {e}")
+            logger.warning("Could not capture UI settings: %s", e)
             return {}
 
     def _save_images(self, p: StableDiffusionProcessing, params: Dict) -> None:
         """Save init images and mask for img2img."""
+        jobs = []  # (image, path) pairs to save
+
         # Save init images
         if hasattr(p, 'init_images') and p.init_images:
-            temp_dir = os.path.join(ext_dir, "temp_images")
-            os.makedirs(temp_dir, exist_ok=True)
-
             init_image_paths = []
-            for i, img in enumerate(p.init_images):
+            for img in p.init_images:
                 if img is not None:
-                    img_filename = f"{uuid.uuid4()}.png"
-                    img_path = os.path.join(temp_dir, img_filename)
-                    img.save(img_path)
+                    img_path = os.path.join(temp_images_dir, f"{secrets.token_hex(12)}.png")
+                    jobs.append((img, img_path))
                     init_image_paths.append(img_path)
 
             params["init_images"] = init_image_paths
 
         # Save mask if present
         if hasattr(p, 'image_mask') and p.image_mask is not None:
-            temp_dir = os.path.join(ext_dir, "temp_images")
-            os.makedirs(temp_dir, exist_ok=True)
-            mask_filename = f"mask_{uuid.uuid4()}.png"
-            mask_path = os.path.join(temp_dir, mask_filename)
-            p.image_mask.save(mask_path)
+            mask_path = os.path.join(temp_images_dir, f"mask_{secrets.token_hex(12)}.png")
+            jobs.append((p.image_mask, mask_path))
             params["mask_path"] = mask_path
 
+        if jobs:
+            os.makedirs(temp_images_dir, exist_ok=True)
+            _save_scratch_images(jobs)
+
     def _capture_script_args(self, p: StableDiffusionProcessing, task_type: TaskType) -> Tuple[List, Optional[List]]:
         """Capture script arguments for extensions."""
         script_args = []
@@ -170,13 +183,12 @@ class BaseParameterCapture(ABC):
         skip_ranges = set()
 
         if enable_controlnet:
-            print("[TaskScheduler] ControlNet capture ENABLED")
+            logger.debug("ControlNet capture ENABLED")
         else:
-            print("[TaskScheduler] ControlNet capture disabled")
+            logger.debug("ControlNet capture disabled")
 
         try:
-            from modules import scripts as scripts_module
-            script_runner = scripts_module.scripts_txt2img if task_type == TaskType.TXT2IMG else scripts_module.scripts_img2img
+            script_runner = scripts.scripts_txt2img if task_type == TaskType.TXT2IMG else scripts.scripts_img2img
             if script_runner:
                 for script in script_runner.scripts:
                     script_title = getattr(script, 'title', lambda: '')()
@@ -184,30 +196,22 @@ class BaseParameterCapture(ABC):
                         args_from = getattr(script, 'args_from', None)
                         args_to = getattr(script, 'args_to', None)
                         if args_from is not None and args_to is not None:
-                            for idx in range(args_from, args_to):
-                                skip_ranges.add(idx)
-                            print(f"[TaskScheduler] Skipping {script_title} args [{args_from}:{args_to}]")
+                            skip_ranges.update(range(args_from, args_to))
+                            logger.debug("Skipping %s args [%s:%s]", script_title, args_from, args_to)
         except Exception as e:
-            print(f"[TaskScheduler] Error identifying scripts to skip: {e}")
+            logger.warning("Error identifying scripts to skip: %s", e)
 
         # Try to get script args mapping for labels
         args_mapping = None
         try:
-            from task_scheduler.script_args_mapper import get_cached_mapping
             args_mapping = get_cached_mapping()
             if args_mapping:
                 script_args_labeled = []
         except Exception:
             pass
 
-        # Import ControlNet helper if enabled
-        controlnet_helper = None
-        if enable_controlnet:
-            try:
-                from task_scheduler.controlnet_helper import serialize_script_arg, is_controlnet_unit
-                controlnet_helper = {'serialize': serialize_script_arg, 'is_unit': is_controlnet_unit}
-            except ImportError:
-                pass
+        if script_args_labeled is not None:
+            label_templates = _label_templates_for(args_mapping)
 
         if hasattr(p, 'script_args') and p.script_args:
             for i, arg in enumerate(p.script_args):
@@ -215,28 +219,23 @@ class BaseParameterCapture(ABC):
                 if i in skip_ranges:
                     script_args.append(None)
                     if script_args_labeled is not None:
-                        script_args_labeled.append({
-                            "index": i,
-                            "name": f"arg_{i}",
-                            "label": f"[Skipped] Argument {i}",
-                            "script": "ControlNet",
-                            "type": "skipped",
-                            "value": None
-                        })
+                        script_args_labeled.append(_skipped_label_template(i).copy())
                     continue
 
                 # Serialize the value
                 serialized_value = None
 
                 # Try ControlNet serialization first
-                if controlnet_helper and controlnet_helper['is_unit'](arg):
+                if enable_controlnet and is_controlnet_unit(arg):
                     try:
-                        serialized_value = controlnet_helper['serialize'](arg)
+                        serialized_value = serialize_script_arg(arg)
                     except Exception:
                         serialized_value = None
 
                 # Fall back to regular serialization
-                if serialized_value is None:
+                if serialized_value is None and type(arg) in JSON_SCALARS:
+                    serialized_value = arg  # Always serializable, skip the test
+                elif serialized_value is None:
                     try:
                         json.dumps(arg)
                         serialized_value = arg
@@ -252,33 +251,193 @@ class BaseParameterCapture(ABC):
 
                 # Build labeled entry
                 if script_args_labeled is not None:
-                    if args_mapping and i in args_mapping:
-                        info = args_mapping[i]
-                        script_args_labeled.append({
-                            "index": i,
-                            "name": info.get("name", f"arg_{i}"),
-                            "label": info.get("label", f"Argument {i}"),
-                            "script": info.get("script"),
-                            "type": info.get("type", "unknown"),
-                            "value": serialized_value
-                        })
-                    else:
-                        script_args_labeled.append({
-                            "index": i,
-                            "name": f"arg_{i}",
-                            "label": f"Argument {i}",
-                            "script": None,
-                            "type": "unknown",
-                            "value": serialized_value
-                        })
-
-        print(f"[TaskScheduler] Captured {len(script_args)} script_args")
+                    entry = label_templates.get(i)
+                    if entry is None:
+                        entry = label_templates[i] = _label_template(i, args_mapping.get(i))
+                    entry = entry.copy()
+                    entry["value"] = serialized_value
+                    script_args_labeled.append(entry)
+
+        logger.debug("Captured %s script_args", len(script_args))
         return script_args, script_args_labeled
 
 
+# Labeled script arg entries per index, without "value", for the mapping
+# they were built from; get_cached_mapping() returns the same dict until
+# the scripts change, so these are reused across captures.
+_label_templates: Tuple[Optional[Dict], Dict[int, Dict]] = (None, {})
+
+
+def _label_templates_for(args_mapping: Dict) -> Dict[int, Dict]:
+    """Get the label template cache for args_mapping, starting a new one if the mapping changed."""
+    global _label_templates
+    if _label_templates[0] is not args_mapping:
+        _label_templates = (args_mapping, {})
+    return _label_templates[1]
+
+
+def _label_template(i: int, info: Optional[ArgInfo]) -> Dict:
+    """Build the labeled entry for script arg i from its mapping info (if any)."""
+    if info is None:
+        return {
+            "index": i,
+            "name": f"arg_{i}",
+            "label": f"Argument {i}",
+            "script": None,
+            "type": "unknown",
+            "value": None
+        }
+    return {
+        "index": i,
+        "name": info.name,
+        "label": info.label,
+        "script": info.script,
+        "type": info.type,
+        "value": None
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _skipped_label_template(i: int) -> Dict:
+    """Labeled entry for script arg i when it belongs to a skipped script."""
+    return {
+        "index": i,
+        "name": f"arg_{i}",
+        "label": f"[Skipped] Argument {i}",
+        "script": "ControlNet",
+        "type": "skipped",
+        "value": None
+    }
+
+
+def _copy_dict(value) -> Dict:
+    """Shallow-copy a mapping into a plain dict; None or empty gives {}."""
+    if not value:
+        return {}
+    # dict.copy() skips the per-item iteration dict() does
+    return value.copy() if type(value) is dict else dict(value)
+
+
+# Saved images are read back once, so favour encode speed over file size
+_SCRATCH_PNG_COMPRESS_LEVEL = 1
+
+
+def _save_scratch_image(job: Tuple[Image.Image, str]) -> None:
+    """Save one (image, path) pair as a PNG."""
+    img, path = job
+    img.save(path, compress_level=_SCRATCH_PNG_COMPRESS_LEVEL)
+
+
+def _save_scratch_images(jobs: List[Tuple[Image.Image, str]]) -> None:
+    """Save (image, path) pairs as PNGs, several at once if there are more than one."""
+    if len(jobs) == 1:
+        _save_scratch_image(jobs[0])
+        return
+    # PIL releases the GIL while encoding, so the saves run in parallel
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as pool:
+        list(pool.map(_save_scratch_image, jobs))
+
+
+# Formats load_image() accepts. Capture saves PNG; JPEG/WebP cover image paths
+# set by other means. Pillow skips probing its other format plugins.
+_LOAD_IMAGE_FORMATS = ("PNG", "JPEG", "WEBP")
+
+
+@functools.lru_cache(maxsize=8)
+def _decode_image(path: str, mtime_ns: int, size: int) -> Image.Image:
+    """Decode an image file. Cached per (path, mtime, size), so an edited file is re-read."""
+    img = Image.open(path, formats=_LOAD_IMAGE_FORMATS)
+    img.load()
+    return img
+
+
+def load_image(path: str) -> Image.Image:
+    """
+    Load an init image or mask for restoring a task.
+
+    Retried and resumed tasks point at the same saved files, so decoded
+    images are reused while the file is unchanged. Each call returns a copy,
+    which callers are free to modify.
+    """
+    st = os.stat(path)
+    return _decode_image(path, st.st_mtime_ns, st.st_size).copy()
+
+
+def vae_from_forge_modules(forge_modules: Optional[List[str]]) -> str:
+    """
+    Get the VAE file name from captured forge_additional_modules.
+
+    Returns:
+        The file name of the first module with "vae" in its path (any case),
+        else of the first module; "" if there are none.
+    """
+    if not forge_modules:
+        return ""
+    vae_path = next((m for m in forge_modules if m and "vae" in m.lower()), None)
+    return (os.path.basename(vae_path) if vae_path else "") or os.path.basename(forge_modules[0] or "")
+
+
+def _load_image_or_error(path: str):
+    """load_image() that returns the exception instead of raising it."""
+    try:
+        return load_image(path)
+    except Exception as e:
+        return e
+
+
+def _load_images(paths: List[str]) -> list:
+    """Load images in order, several at once if there are more than one (errors are returned in place)."""
+    if len(paths) <= 1:
+        return [_load_image_or_error(path) for path in paths]
+    # PIL releases the GIL while decoding, so the loads run in parallel
+    with ThreadPoolExecutor(max_workers=min(4, len(paths))) as pool:
+        return list(pool.map(_load_image_or_error, paths))
+
+
 class BaseParameterRestore(ABC):
     """Base class for parameter restoration strategies."""
 
+    def _load_img2img_images(self, params: Dict) -> Tuple[List[Image.Image], Optional[Image.Image]]:
+        """
+        Load the saved init images and mask of an img2img task.
+
+        Files are decoded in parallel when there is more than one. Images
+        that fail to load are logged and left out.
+
+        Args:
+            params: The params dict from the task.
+
+        Returns:
+            Tuple of (init images, mask or None).
+
+        Raises:
+            ValueError: If none of the init images could be loaded.
+        """
+        init_image_paths = params.get("init_images", [])
+        mask_path = params.get("mask_path")
+        paths = list(init_image_paths) + ([mask_path] if mask_path else [])
+
+        results = _load_images(paths)
+
+        init_images = []
+        for img_path, result in zip(init_image_paths, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to load init image: %s - %s", img_path, result)
+            else:
+                init_images.append(result)
+
+        if not init_images:
+            raise ValueError("No valid init images found for img2img task")
+
+        mask = None
+        if mask_path:
+            mask = results[-1]
+            if isinstance(mask, Exception):
+                logger.warning("Failed to load mask: %s - %s", mask_path, mask)
+                mask = None
+
+        return init_images, mask
+
     @abstractmethod
     def create_txt2img(self, params: Dict, override_settings: Dict):
         """
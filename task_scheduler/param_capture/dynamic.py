@@ -4,9 +4,10 @@ Dynamic parameter capture and restoration that handles all serializable attribut
 This approach is future-proof - any new fields Forge adds will be automatically
 captured and restored.
 """
+import inspect
 import json
-import os
-from typing import Dict
+from types import FunctionType
+from typing import Any, Dict, FrozenSet
 
 from modules import scripts, shared
 from modules.processing import (
@@ -14,9 +15,41 @@ from modules.processing import (
     StableDiffusionProcessingTxt2Img,
     StableDiffusionProcessingImg2Img,
 )
-from PIL import Image
 
-from .base import BaseParameterCapture, BaseParameterRestore
+from ..log import logger
+from .base import JSON_SCALARS, BaseParameterCapture, BaseParameterRestore, vae_from_forge_modules
+
+
+# Processing class -> its public attribute names that can hold restorable
+# data. The instance's own attributes are added per object, so only these
+# are cached.
+_CLASS_ATTR_NAMES: Dict[type, FrozenSet[str]] = {}
+
+
+def _is_data_attr(value: Any) -> bool:
+    """Check a raw class attribute: False for methods and read-only properties."""
+    if isinstance(value, (FunctionType, staticmethod, classmethod)):
+        return False
+    if isinstance(value, property):
+        # A read-only property can't be restored, so don't run its getter
+        return value.fset is not None
+    return True
+
+
+def _class_attr_names(cls: type) -> FrozenSet[str]:
+    """Get the public attribute names of a class that can hold data (cached)."""
+    names = _CLASS_ATTR_NAMES.get(cls)
+    if names is None:
+        names = _CLASS_ATTR_NAMES[cls] = frozenset(
+            name for name in dir(cls)
+            if not name.startswith('_') and _is_data_attr(inspect.getattr_static(cls, name))
+        )
+    return names
+
+
+def _public_attr_names(p: StableDiffusionProcessing) -> list:
+    """Get the public attribute names of p that may hold data, like a filtered dir(p)."""
+    return sorted(_class_attr_names(type(p)).union(name for name in vars(p) if not name.startswith('_')))
 
 
 class DynamicParameterCapture(BaseParameterCapture):
@@ -29,24 +62,34 @@ class DynamicParameterCapture(BaseParameterCapture):
     def _capture_core_params(self, p: StableDiffusionProcessing) -> Dict:
         """Dynamically capture all serializable attributes from processing object."""
         params = {}
+        others = {}  # Non-scalar values, which may not serialize
 
-        for attr_name in dir(p):
-            # Skip private/magic attributes
-            if attr_name.startswith('_'):
-                continue
+        for attr_name in _public_attr_names(p):
             try:
                 value = getattr(p, attr_name)
-                # Skip methods/callables
-                if callable(value):
-                    continue
-                # Try to serialize - if it works, keep it
-                json.dumps(value)
-                params[attr_name] = value
             except (TypeError, ValueError, AttributeError):
-                # Not serializable, skip silently
-                pass
+                continue
+            # Skip methods/callables
+            if callable(value):
+                continue
+            params[attr_name] = value
+            # Plain scalars always serialize; only other values need a test
+            if type(value) not in JSON_SCALARS:
+                others[attr_name] = value
+
+        # Test the other values all at once; if that fails, drop the ones
+        # that don't serialize on their own
+        try:
+            json.dumps(others)
+        except (TypeError, ValueError):
+            for attr_name, value in others.items():
+                try:
+                    json.dumps(value)
+                except (TypeError, ValueError):
+                    # Not serializable, skip silently
+                    del params[attr_name]
 
-        print(f"[TaskScheduler] DynamicCapture: captured {len(params)} parameters")
+        logger.debug("DynamicCapture: captured %s parameters", len(params))
         return params
 
 
@@ -81,7 +124,7 @@ class DynamicParameterRestore(BaseParameterRestore):
         # Set scripts
         p.scripts = scripts.scripts_txt2img
 
-        print("[TaskScheduler] DynamicRestore: created txt2img processing object")
+        logger.debug("DynamicRestore: created txt2img processing object")
         return p
 
     def create_img2img(self, params: Dict, override_settings: Dict) -> StableDiffusionProcessingImg2Img:
@@ -89,27 +132,8 @@ class DynamicParameterRestore(BaseParameterRestore):
         base_samples = shared.opts.outdir_samples or shared.opts.outdir_img2img_samples
         base_grids = shared.opts.outdir_grids or shared.opts.outdir_img2img_grids
 
-        # Load init images
-        init_images = []
-        init_image_paths = params.get("init_images", [])
-        for img_path in init_image_paths:
-            try:
-                img = Image.open(img_path)
-                init_images.append(img)
-            except Exception as e:
-                print(f"[TaskScheduler] Failed to load init image: {img_path} - {e}")
-
-        if not init_images:
-            raise ValueError("No valid init images found for img2img task")
-
-        # Load mask if present
-        mask = None
-        mask_path = params.get("mask_path")
-        if mask_path:
-            try:
-                mask = Image.open(mask_path)
-            except Exception as e:
-                print(f"[TaskScheduler] Failed to load mask: {mask_path} - {e}")
+        # Load init images and mask (if present) before the constructor
+        init_images, mask = self._load_img2img_images(params)
 
         # Create with minimal constructor args + required img2img params
         p = StableDiffusionProcessingImg2Img(
@@ -126,13 +150,16 @@ class DynamicParameterRestore(BaseParameterRestore):
         # Set scripts
         p.scripts = scripts.scripts_img2img
 
-        print("[TaskScheduler] DynamicRestore: created img2img processing object")
+        logger.debug("DynamicRestore: created img2img processing object")
         return p
 
     def _apply_all_params(self, p, params: Dict) -> None:
         """Apply all params from dict to processing object."""
         applied = []
         skipped = []
+        # Attributes p has, looked up without running property getters
+        instance_attrs = vars(p)
+        class_attrs = _class_attr_names(type(p))
         for key, value in params.items():
             if key in self.SKIP_KEYS or key.startswith("_"):
                 continue
@@ -140,14 +167,14 @@ class DynamicParameterRestore(BaseParameterRestore):
             if value is None:
                 skipped.append(key)
                 continue
-            if hasattr(p, key):
+            if key in instance_attrs or key in class_attrs:
                 try:
                     setattr(p, key, value)
                     applied.append(key)
                 except Exception:
                     pass  # Skip if can't set
 
-        print(f"[TaskScheduler] DynamicRestore: applied {len(applied)} params, skipped {len(skipped)} None values")
+        logger.debug("DynamicRestore: applied %s params, skipped %s None values", len(applied), len(skipped))
 
     def apply_params(self, p, params: Dict) -> None:
         """Apply params - used if called separately."""
@@ -169,17 +196,8 @@ class DynamicParameterRestore(BaseParameterRestore):
         override_settings = params.get("override_settings", {})
 
         # Get VAE filename - priority: forge_additional_modules > override_settings > ui_settings
-        vae = ""
-
         # Check Forge's additional_modules first (contains full VAE path)
-        forge_modules = ui_settings.get("forge_additional_modules", [])
-        if forge_modules:
-            for module_path in forge_modules:
-                if module_path and ("vae" in module_path.lower() or "VAE" in module_path):
-                    vae = os.path.basename(module_path)
-                    break
-            if not vae and forge_modules:
-                vae = os.path.basename(forge_modules[0])
+        vae = vae_from_forge_modules(ui_settings.get("forge_additional_modules"))
 
         # Fall back to override_settings, then ui_settings
         if not vae:
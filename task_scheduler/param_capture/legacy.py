@@ -4,7 +4,6 @@ Legacy parameter capture and restoration using hardcoded field names.
 This is the original, stable approach that explicitly captures/restores known fields.
 Use this for maximum compatibility with existing tasks.
 """
-import os
 from typing import Dict, Any
 
 from modules import scripts, shared
@@ -13,9 +12,107 @@ from modules.processing import (
     StableDiffusionProcessingTxt2Img,
     StableDiffusionProcessingImg2Img,
 )
-from PIL import Image
 
-from .base import BaseParameterCapture, BaseParameterRestore
+from ..log import logger
+from .base import BaseParameterCapture, BaseParameterRestore, vae_from_forge_modules
+
+
+# Processing constructor arguments taken from params as-is, with the default
+# used when a task doesn't have them. List-valued arguments ("styles", stored
+# as prompt_styles, and hr_additional_modules) are added per call so tasks
+# never share a default list.
+_COMMON_DEFAULTS = {
+    "prompt": "",
+    "negative_prompt": "",
+    "batch_size": 1,
+    "n_iter": 1,
+    "cfg_scale": 7.0,
+    "distilled_cfg_scale": 3.5,
+    "width": 512,
+    "height": 512,
+}
+
+_TXT2IMG_DEFAULTS = {
+    **_COMMON_DEFAULTS,
+    "enable_hr": False,
+    "denoising_strength": 0.7,
+    "hr_scale": 2.0,
+    "hr_upscaler": "Latent",
+    "hr_second_pass_steps": 0,
+    "hr_resize_x": 0,
+    "hr_resize_y": 0,
+    "hr_checkpoint_name": None,
+    "hr_sampler_name": None,
+    "hr_scheduler": None,
+    "hr_prompt": "",
+    "hr_negative_prompt": "",
+}
+
+_IMG2IMG_DEFAULTS = {
+    **_COMMON_DEFAULTS,
+    "mask_blur": 4,
+    "inpainting_fill": 0,
+    "resize_mode": 0,
+    "denoising_strength": 0.75,
+    "image_cfg_scale": 1.5,
+    "inpaint_full_res": False,
+    "inpaint_full_res_padding": 32,
+    "inpainting_mask_invert": 0,
+}
+
+# Set on the processing object after construction, only if the task has them
+_POST_INIT_PARAMS = ("sampler_name", "scheduler", "steps", "seed", "subseed", "subseed_strength")
+
+
+# Optional (name, default) attributes captured for hires fix and img2img tasks
+_HR_CAPTURE_FIELDS = (
+    ("denoising_strength", 0.7),
+    ("hr_scale", 2.0),
+    ("hr_upscaler", "Latent"),
+    ("hr_second_pass_steps", 0),
+    ("hr_resize_x", 0),
+    ("hr_resize_y", 0),
+    ("hr_checkpoint_name", None),
+    ("hr_sampler_name", None),
+    ("hr_scheduler", None),
+    ("hr_prompt", ""),
+    ("hr_negative_prompt", ""),
+    ("hr_additional_modules", None),
+    ("hr_cfg", None),
+    ("hr_distilled_cfg", None),
+)
+
+_IMG2IMG_CAPTURE_FIELDS = (
+    ("denoising_strength", 0.75),
+    ("resize_mode", 0),
+    ("image_cfg_scale", None),
+    ("mask_blur", 4),
+    ("inpainting_fill", 0),
+    ("inpaint_full_res", True),
+    ("inpaint_full_res_padding", 0),
+    ("inpainting_mask_invert", 0),
+    ("initial_noise_multiplier", None),
+)
+
+
+def _read_attrs(p: StableDiffusionProcessing, fields) -> Dict:
+    """Read (name, default) fields from p, like getattr(p, name, default) for each."""
+    # Most are plain instance attributes; only the rest (class attributes,
+    # properties, missing ones) need a full getattr
+    d = vars(p)
+    return {name: d[name] if name in d else getattr(p, name, default) for name, default in fields}
+
+
+def _constructor_kwargs(params: Dict, defaults: Dict) -> Dict:
+    """Get the constructor arguments in defaults from params, falling back to the defaults."""
+    return {**defaults, **{key: params[key] for key in defaults.keys() & params.keys()}}
+
+
+def _apply_post_init_params(p: StableDiffusionProcessing, params: Dict) -> None:
+    """Set the _POST_INIT_PARAMS the task has on the processing object."""
+    for key in _POST_INIT_PARAMS:
+        if key in params:
+            setattr(p, key, params[key])
 
 
 class LegacyParameterCapture(BaseParameterCapture):
@@ -54,34 +151,13 @@ class LegacyParameterCapture(BaseParameterCapture):
         # Hires fix params (if enabled)
         if getattr(p, 'enable_hr', False):
             params["enable_hr"] = True
-            params["denoising_strength"] = getattr(p, 'denoising_strength', 0.7)
-            params["hr_scale"] = getattr(p, 'hr_scale', 2.0)
-            params["hr_upscaler"] = getattr(p, 'hr_upscaler', 'Latent')
-            params["hr_second_pass_steps"] = getattr(p, 'hr_second_pass_steps', 0)
-            params["hr_resize_x"] = getattr(p, 'hr_resize_x', 0)
-            params["hr_resize_y"] = getattr(p, 'hr_resize_y', 0)
-            params["hr_checkpoint_name"] = getattr(p, 'hr_checkpoint_name', None)
-            params["hr_sampler_name"] = getattr(p, 'hr_sampler_name', None)
-            params["hr_scheduler"] = getattr(p, 'hr_scheduler', None)
-            params["hr_prompt"] = getattr(p, 'hr_prompt', '')
-            params["hr_negative_prompt"] = getattr(p, 'hr_negative_prompt', '')
-            params["hr_additional_modules"] = getattr(p, 'hr_additional_modules', None)
-            params["hr_cfg"] = getattr(p, 'hr_cfg', None)
-            params["hr_distilled_cfg"] = getattr(p, 'hr_distilled_cfg', None)
+            params.update(_read_attrs(p, _HR_CAPTURE_FIELDS))
 
         # Img2img specific params
         if hasattr(p, 'init_images') and p.init_images:
-            params["denoising_strength"] = getattr(p, 'denoising_strength', 0.75)
-            params["resize_mode"] = getattr(p, 'resize_mode', 0)
-            params["image_cfg_scale"] = getattr(p, 'image_cfg_scale', None)
-            params["mask_blur"] = getattr(p, 'mask_blur', 4)
-            params["inpainting_fill"] = getattr(p, 'inpainting_fill', 0)
-            params["inpaint_full_res"] = getattr(p, 'inpaint_full_res', True)
-            params["inpaint_full_res_padding"] = getattr(p, 'inpaint_full_res_padding', 0)
-            params["inpainting_mask_invert"] = getattr(p, 'inpainting_mask_invert', 0)
-            params["initial_noise_multiplier"] = getattr(p, 'initial_noise_multiplier', None)
-
-        print(f"[TaskScheduler] LegacyCapture: captured {len(params)} parameters")
+            params.update(_read_attrs(p, _IMG2IMG_CAPTURE_FIELDS))
+
+        logger.debug("LegacyCapture: captured %s parameters", len(params))
         return params
 
 
@@ -100,62 +176,32 @@ class LegacyParameterRestore(BaseParameterRestore):
         hr_distilled_cfg_value = params.get("hr_distilled_cfg")
 
         # Build constructor kwargs
-        constructor_kwargs = {
-            "outpath_samples": base_samples,
-            "outpath_grids": base_grids,
-            "prompt": params.get("prompt", ""),
-            "negative_prompt": params.get("negative_prompt", ""),
-            "styles": params.get("prompt_styles", []),
-            "batch_size": params.get("batch_size", 1),
-            "n_iter": params.get("n_iter", 1),
-            "cfg_scale": params.get("cfg_scale", 7.0),
-            "distilled_cfg_scale": params.get("distilled_cfg_scale", 3.5),
-            "width": params.get("width", 512),
-            "height": params.get("height", 512),
-            "enable_hr": params.get("enable_hr", False),
-            "denoising_strength": params.get("denoising_strength", 0.7),
-            "hr_scale": params.get("hr_scale", 2.0),
-            "hr_upscaler": params.get("hr_upscaler", "Latent"),
-            "hr_second_pass_steps": params.get("hr_second_pass_steps", 0),
-            "hr_resize_x": params.get("hr_resize_x", 0),
-            "hr_resize_y": params.get("hr_resize_y", 0),
-            "hr_checkpoint_name": params.get("hr_checkpoint_name"),
-            "hr_additional_modules": params.get("hr_additional_modules", []),
-            "hr_sampler_name": params.get("hr_sampler_name"),
-            "hr_scheduler": params.get("hr_scheduler"),
-            "hr_prompt": params.get("hr_prompt", ""),
-            "hr_negative_prompt": params.get("hr_negative_prompt", ""),
-            "override_settings": override_settings,
-        }
+        constructor_kwargs = _constructor_kwargs(params, _TXT2IMG_DEFAULTS)
+        constructor_kwargs.update(
+            outpath_samples=base_samples,
+            outpath_grids=base_grids,
+            styles=params.get("prompt_styles", []),
+            hr_additional_modules=params.get("hr_additional_modules", []),
+            override_settings=override_settings,
+        )
 
         # Add hr_cfg params to constructor if they have values
         if hr_cfg_value is not None:
             constructor_kwargs["hr_cfg"] = hr_cfg_value
-            print(f"[TaskScheduler] Setting hr_cfg in constructor: {hr_cfg_value}")
+            logger.debug("Setting hr_cfg in constructor: %s", hr_cfg_value)
         if hr_distilled_cfg_value is not None:
             constructor_kwargs["hr_distilled_cfg"] = hr_distilled_cfg_value
-            print(f"[TaskScheduler] Setting hr_distilled_cfg in constructor: {hr_distilled_cfg_value}")
+            logger.debug("Setting hr_distilled_cfg in constructor: %s", hr_distilled_cfg_value)
 
         p = StableDiffusionProcessingTxt2Img(**constructor_kwargs)
 
         # Set additional params
-        if "sampler_name" in params:
-            p.sampler_name = params["sampler_name"]
-        if "scheduler" in params:
-            p.scheduler = params["scheduler"]
-        if "steps" in params:
-            p.steps = params["steps"]
-        if "seed" in params:
-            p.seed = params["seed"]
-        if "subseed" in params:
-            p.subseed = params["subseed"]
-        if "subseed_strength" in params:
-            p.subseed_strength = params["subseed_strength"]
+        _apply_post_init_params(p, params)
 
         # Set scripts
         p.scripts = scripts.scripts_txt2img
 
-        print("[TaskScheduler] LegacyRestore: created txt2img processing object")
+        logger.debug("LegacyRestore: created txt2img processing object")
         return p
 
     def create_img2img(self, params: Dict, override_settings: Dict) -> StableDiffusionProcessingImg2Img:
@@ -163,71 +209,26 @@ class LegacyParameterRestore(BaseParameterRestore):
         base_samples = shared.opts.outdir_samples or shared.opts.outdir_img2img_samples
         base_grids = shared.opts.outdir_grids or shared.opts.outdir_img2img_grids
 
-        # Load init images
-        init_images = []
-        init_image_paths = params.get("init_images", [])
-        for img_path in init_image_paths:
-            try:
-                img = Image.open(img_path)
-                init_images.append(img)
-            except Exception as e:
-                print(f"[TaskScheduler] Failed to load init image: {img_path} - {e}")
-
-        if not init_images:
-            raise ValueError("No valid init images found for img2img task")
-
-        # Load mask if present
-        mask = None
-        mask_path = params.get("mask_path")
-        if mask_path:
-            try:
-                mask = Image.open(mask_path)
-            except Exception as e:
-                print(f"[TaskScheduler] Failed to load mask: {mask_path} - {e}")
+        # Load init images and mask (if present) before the constructor
+        init_images, mask = self._load_img2img_images(params)
 
         p = StableDiffusionProcessingImg2Img(
             outpath_samples=base_samples,
             outpath_grids=base_grids,
-            prompt=params.get("prompt", ""),
-            negative_prompt=params.get("negative_prompt", ""),
             styles=params.get("prompt_styles", []),
-            batch_size=params.get("batch_size", 1),
-            n_iter=params.get("n_iter", 1),
-            cfg_scale=params.get("cfg_scale", 7.0),
-            distilled_cfg_scale=params.get("distilled_cfg_scale", 3.5),
-            width=params.get("width", 512),
-            height=params.get("height", 512),
             init_images=init_images,
             mask=mask,
-            mask_blur=params.get("mask_blur", 4),
-            inpainting_fill=params.get("inpainting_fill", 0),
-            resize_mode=params.get("resize_mode", 0),
-            denoising_strength=params.get("denoising_strength", 0.75),
-            image_cfg_scale=params.get("image_cfg_scale", 1.5),
-            inpaint_full_res=params.get("inpaint_full_res", False),
-            inpaint_full_res_padding=params.get("inpaint_full_res_padding", 32),
-            inpainting_mask_invert=params.get("inpainting_mask_invert", 0),
             override_settings=override_settings,
+            **_constructor_kwargs(params, _IMG2IMG_DEFAULTS),
         )
 
         # Set additional params
-        if "sampler_name" in params:
-            p.sampler_name = params["sampler_name"]
-        if "scheduler" in params:
-            p.scheduler = params["scheduler"]
-        if "steps" in params:
-            p.steps = params["steps"]
-        if "seed" in params:
-            p.seed = params["seed"]
-        if "subseed" in params:
-            p.subseed = params["subseed"]
-        if "subseed_strength" in params:
-            p.subseed_strength = params["subseed_strength"]
+        _apply_post_init_params(p, params)
 
         # Set scripts
         p.scripts = scripts.scripts_img2img
 
-        print("[TaskScheduler] LegacyRestore: created img2img processing object")
+        logger.debug("LegacyRestore: created img2img processing object")
         return p
 
     def apply_params(self, p, params: Dict) -> None:
@@ -247,17 +248,8 @@ class LegacyParameterRestore(BaseParameterRestore):
         override_settings = params.get("override_settings", {})
 
         # Get VAE filename - priority: forge_additional_modules > override_settings > ui_settings
-        vae = ""
-
         # Check Forge's additional_modules first (contains full VAE path)
-        forge_modules = ui_settings.get("forge_additional_modules", [])
-        if forge_modules:
-            for module_path in forge_modules:
-                if module_path and ("vae" in module_path.lower() or "VAE" in module_path):
-                    vae = os.path.basename(module_path)
-                    break
-            if not vae and forge_modules:
-                vae = os.path.basename(forge_modules[0])
+        vae = vae_from_forge_modules(ui_settings.get("forge_additional_modules"))
 
         # Fall back to override_settings, then ui_settings
         if not vae:
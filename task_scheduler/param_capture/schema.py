@@ -4,8 +4,9 @@ Schema definitions and validation for parameter capture/restore.
 Defines the expected structure of data returned by param handlers,
 with recursive validation support for nested fields.
 """
+import functools
 from dataclasses import dataclass, fields, is_dataclass
-from typing import Any, Dict, Optional, Union, get_type_hints, get_origin, get_args
+from typing import Any, Dict, Optional, Tuple, Union, get_type_hints, get_origin, get_args
 
 
 class SkipNested:
@@ -42,50 +43,61 @@ def validate_schema(data: Dict[str, Any], schema_cls, path: str = "") -> None:
     if not isinstance(data, dict):
         raise ValueError(f"{path or 'data'} must be a dict, got {type(data).__name__}")
 
-    hints = get_type_hints(schema_cls)
-
-    for field_name, field_type in hints.items():
+    for field_name, nested_cls, optional in _field_checks(schema_cls):
         field_path = f"{path}.{field_name}" if path else field_name
 
         # Check field exists in data
         if field_name not in data:
             raise ValueError(f"Missing required field: {field_path}")
 
-        value = data[field_name]
-
-        # Skip nested validation if marked with SkipNested
-        if field_type is SkipNested:
+        # Only nested dataclass schemas need more than the key check
+        if nested_cls is None:
             continue
 
-        # Handle Optional[X] - unwrap to get inner type
-        origin = get_origin(field_type)
-        inner_type = field_type
-
-        if origin is Union:
-            args = get_args(field_type)
-            # Check if it's Optional (Union with None)
-            if type(None) in args:
-                # If value is None, skip further validation
-                if value is None:
-                    continue
-                # Get the non-None type for further validation
-                non_none_types = [a for a in args if a is not type(None)]
-                if len(non_none_types) == 1:
-                    inner_type = non_none_types[0]
-
-        # Recursively validate nested dataclass schemas
-        if is_dataclass(inner_type):
-            if value is None:
-                # None is acceptable only if the original type was Optional
-                if origin is not Union or type(None) not in get_args(field_type):
-                    raise ValueError(f"Field {field_path} cannot be None (not Optional)")
-            else:
-                if not isinstance(value, dict):
-                    raise ValueError(
-                        f"Field {field_path} must be a dict for nested schema, "
-                        f"got {type(value).__name__}"
-                    )
-                validate_schema(value, inner_type, field_path)
+        value = data[field_name]
+        if value is None:
+            # None is acceptable only if the type was Optional
+            if optional:
+                continue
+            raise ValueError(f"Field {field_path} cannot be None (not Optional)")
+        if not isinstance(value, dict):
+            raise ValueError(
+                f"Field {field_path} must be a dict for nested schema, "
+                f"got {type(value).__name__}"
+            )
+        validate_schema(value, nested_cls, field_path)
+
+
+@functools.lru_cache(maxsize=32)
+def _field_checks(schema_cls) -> Tuple[Tuple[str, Optional[type], bool], ...]:
+    """
+    Work out how to validate each field of a schema dataclass (cached per class).
+
+    Returns:
+        Tuple of (field name, nested dataclass schema or None, is Optional)
+        per field. Fields typed SkipNested or as a non-dataclass type get
+        None, so only their key is checked.
+    """
+    checks = []
+    for field_name, field_type in get_type_hints(schema_cls).items():
+        nested_cls = None
+        optional = False
+
+        if field_type is not SkipNested:
+            # Handle Optional[X] - unwrap to get inner type
+            inner_type = field_type
+            if get_origin(field_type) is Union:
+                args = get_args(field_type)
+                if type(None) in args:
+                    optional = True
+                    non_none_types = [a for a in args if a is not type(None)]
+                    if len(non_none_types) == 1:
+                        inner_type = non_none_types[0]
+            if is_dataclass(inner_type):
+                nested_cls = inner_type
+
+        checks.append((field_name, nested_cls, optional))
+    return tuple(checks)
 
 
 # =============================================================================
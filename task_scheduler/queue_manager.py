@@ -2,38 +2,63 @@
 Queue manager for task scheduling operations.
 Provides high-level interface for queue operations.
 """
-from typing import List, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Callable, Tuple
 from datetime import datetime
 import threading
 
+from .log import logger
 from .models import Task, TaskStatus, TaskType
 from .db import get_database, TaskDatabase
 
 
+# Runs queue change callbacks off the caller's thread. One worker, so they
+# run in the order the changes happened.
+_callback_pool: Optional[ThreadPoolExecutor] = None
+_callback_pool_lock = threading.Lock()
+
+
+def _get_callback_pool() -> ThreadPoolExecutor:
+    """Get the queue callback pool, creating it on first use."""
+    global _callback_pool
+    if _callback_pool is None:
+        with _callback_pool_lock:
+            if _callback_pool is None:
+                _callback_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TaskSchedulerQueue")
+    return _callback_pool
+
+
+def _run_callbacks(callbacks: tuple, event: str, task: Optional[Task]) -> None:
+    """Call each queue callback, logging (not raising) their errors."""
+    for callback in callbacks:
+        try:
+            callback(event, task)
+        except Exception as e:
+            logger.warning("Callback error: %s", e)
+
+
 class QueueManager:
     """
     Manages the task queue with high-level operations.
-    Thread-safe singleton pattern.
+    Use get_queue_manager() for the shared instance.
     """
 
-    _instance: Optional["QueueManager"] = None
-    _lock = threading.Lock()
-
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
-
     def __init__(self):
-        if self._initialized:
-            return
-
         self._db: TaskDatabase = get_database()
-        self._callbacks: List[Callable] = []
-        self._initialized = True
+        # Replaced (never mutated) on (un)register, so notifying reads it without a lock
+        self._callbacks: Tuple[Callable, ...] = ()
+        self._callbacks_lock = threading.Lock()
+        self._version = 0  # Bumped on every queue change (used for API ETags)
+        self._version_lock = threading.Lock()
+        # False once the DB is known to hold no paused tasks; lets the executor
+        # skip the paused-task query on every loop pass. Starts True since
+        # tasks paused before a restart are still in the DB.
+        self._may_have_paused = True
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter that changes whenever the queue changes."""
+        return self._version
 
     def add_task(
         self,
@@ -65,7 +90,6 @@ class QueueManager:
             script_args=script_args,
             name=name,
             status=TaskStatus.PENDING,
-            created_at=datetime.now(),
             capture_format=capture_format
         )
 
@@ -74,31 +98,44 @@ class QueueManager:
 
         return task
 
+    def transaction(self):
+        """Context manager grouping this thread's queue writes into one commit."""
+        return self._db.transaction()
+
     def get_task(self, task_id: str) -> Optional[Task]:
         """Get a task by ID."""
         return self._db.get_task(task_id)
 
-    def get_all_tasks(self, include_completed: bool = True) -> List[Task]:
-        """Get all tasks in the queue."""
-        return self._db.get_all_tasks(include_completed)
+    def get_all_tasks(
+        self,
+        include_completed: bool = True,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Task]:
+        """Get all tasks in the queue (optionally one page of them)."""
+        return self._db.get_all_tasks(include_completed, limit=limit, offset=offset)
 
     def get_pending_tasks(self) -> List[Task]:
         """Get all pending tasks."""
         return self._db.get_pending_tasks()
 
-    def get_next_task(self) -> Optional[Task]:
-        """Get the next task to execute."""
-        return self._db.get_next_pending_task()
+    def claim_next_task(self) -> Optional[Task]:
+        """Take the next pending task and mark it running (atomically)."""
+        task = self._db.claim_next_pending_task()
+        if task:
+            self._notify_change("task_started", task)
+        return task
 
     def update_task(self, task: Task) -> None:
         """Update a task."""
+        if task.status == TaskStatus.PAUSED:
+            self._may_have_paused = True
         self._db.update_task(task)
         self._notify_change("task_updated", task)
 
     def set_task_running(self, task_id: str) -> None:
         """Mark a task as running."""
-        self._db.update_task_status(task_id, TaskStatus.RUNNING)
-        task = self._db.get_task(task_id)
+        task = self._db.set_task_status(task_id, TaskStatus.RUNNING)
         self._notify_change("task_started", task)
 
     def set_task_completed(
@@ -108,32 +145,19 @@ class QueueManager:
         result_info: str
     ) -> None:
         """Mark a task as completed with results."""
-        task = self._db.get_task(task_id)
+        task = self._db.complete_task(task_id, result_images, result_info)
         if task:
-            task.status = TaskStatus.COMPLETED
-            task.completed_at = datetime.now()
-            task.result_images = result_images
-            task.result_info = result_info
-            self._db.update_task(task)
             self._notify_change("task_completed", task)
 
     def set_task_failed(self, task_id: str, error: str) -> None:
         """Mark a task as failed with error message."""
-        self._db.update_task_status(task_id, TaskStatus.FAILED, error=error)
-        task = self._db.get_task(task_id)
+        task = self._db.set_task_status(task_id, TaskStatus.FAILED, error=error)
         self._notify_change("task_failed", task)
 
     def set_task_stopped(self, task_id: str, result_images: List[str] = None, result_info: str = "") -> None:
         """Mark a task as stopped (interrupted by user)."""
-        task = self._db.get_task(task_id)
+        task = self._db.stop_task(task_id, result_images, result_info)
         if task:
-            task.status = TaskStatus.STOPPED
-            task.completed_at = datetime.now()
-            if result_images:
-                task.result_images = result_images
-            if result_info:
-                task.result_info = result_info
-            self._db.update_task(task)
             self._notify_change("task_stopped", task)
 
     def set_task_paused(
@@ -145,27 +169,24 @@ class QueueManager:
         result_info: str = ""
     ) -> None:
         """Mark a task as paused (can be resumed later)."""
-        task = self._db.get_task(task_id)
+        self._may_have_paused = True
+        task = self._db.pause_task(task_id, completed_iterations, original_n_iter, result_images, result_info)
         if task:
-            task.status = TaskStatus.PAUSED
-            task.completed_iterations = completed_iterations
-            task.original_n_iter = original_n_iter
-            if result_images:
-                task.result_images = result_images
-            if result_info:
-                task.result_info = result_info
-            self._db.update_task(task)
             self._notify_change("task_paused", task)
 
     def get_paused_task(self) -> Optional[Task]:
         """Get a paused task to resume."""
-        return self._db.get_paused_task()
+        if not self._may_have_paused:
+            return None
+        task = self._db.get_paused_task()
+        if task is None:
+            self._may_have_paused = False
+        return task
 
     def resume_paused_task(self, task_id: str) -> None:
         """Resume a paused task by setting it back to pending."""
-        task = self._db.get_task(task_id)
-        if task and task.status == TaskStatus.PAUSED:
-            self._db.update_task_status(task_id, TaskStatus.PENDING)
+        task = self._db.set_task_status(task_id, TaskStatus.PENDING, expected_status=TaskStatus.PAUSED)
+        if task:
             self._notify_change("task_resumed", task)
 
     def cancel_task(self, task_id: str) -> bool:
@@ -175,9 +196,9 @@ class QueueManager:
         Returns:
             True if cancelled, False if task wasn't pending.
         """
-        task = self._db.get_task(task_id)
-        if task and task.status == TaskStatus.PENDING:
-            self._db.update_task_status(task_id, TaskStatus.CANCELLED)
+        # Conditional update, so a task the worker just picked up isn't cancelled
+        task = self._db.set_task_status(task_id, TaskStatus.CANCELLED, expected_status=TaskStatus.PENDING)
+        if task:
             self._notify_change("task_cancelled", task)
             return True
         return False
@@ -201,22 +222,19 @@ class QueueManager:
 
     def reorder_task(self, task_id: str, new_priority: int) -> None:
         """Change a task's priority."""
-        self._db.reorder_task(task_id, new_priority)
-        task = self._db.get_task(task_id)
+        task = self._db.reorder_task(task_id, new_priority)
         self._notify_change("task_reordered", task)
 
     def move_task_up(self, task_id: str) -> None:
         """Move a task up in priority (decrease priority number)."""
-        task = self._db.get_task(task_id)
-        if task and task.priority > 0:
-            self._db.reorder_task(task_id, task.priority - 1)
+        task = self._db.shift_task_priority(task_id, -1)
+        if task:
             self._notify_change("task_reordered", task)
 
     def move_task_down(self, task_id: str) -> None:
         """Move a task down in priority (increase priority number)."""
-        task = self._db.get_task(task_id)
+        task = self._db.shift_task_priority(task_id, 1)
         if task:
-            self._db.reorder_task(task_id, task.priority + 1)
             self._notify_change("task_reordered", task)
 
     def get_stats(self) -> dict:
@@ -230,30 +248,54 @@ class QueueManager:
         Returns:
             The new task, or None if original task not found.
         """
-        original = self._db.get_task(task_id)
-        if not original:
-            return None
+        new_tasks = self.retry_tasks([task_id])
+        return new_tasks[0] if new_tasks else None
 
-        # Create new task with same parameters
-        new_task = Task(
-            task_type=original.task_type,
-            params=original.params,
-            checkpoint=original.checkpoint,
-            script_args=original.script_args,
-            name=original.name,
-            status=TaskStatus.PENDING,
-            created_at=datetime.now()
-        )
-
-        self._db.add_task(new_task)
-
-        # Mark original task as requeued
-        original.requeued_task_id = new_task.id
-        self._db.update_task(original)
+    def retry_tasks(self, task_ids: List[str]) -> List[Task]:
+        """
+        Retry several tasks by creating new pending copies, in one commit.
 
-        self._notify_change("task_added", new_task)
+        The copies share one creation time, taken once for the batch.
 
-        return new_task
+        Returns:
+            The new tasks, in order; IDs not found are skipped.
+        """
+        now = datetime.now()
+        originals = []
+        new_tasks = []
+        for task_id in task_ids:
+            original = self._db.get_task(task_id)
+            if not original:
+                continue
+
+            # Create new task with same parameters
+            new_task = Task(
+                task_type=original.task_type,
+                params=original.params,
+                checkpoint=original.checkpoint,
+                script_args=original.script_args,
+                name=original.name,
+                status=TaskStatus.PENDING,
+                created_at=now
+            )
+            # Same params/script_args objects, so the stored JSON can be reused
+            new_task.reuse_serialized(original, "params", "script_args")
+            original.requeued_task_id = new_task.id
+            originals.append(original)
+            new_tasks.append(new_task)
+
+        if not new_tasks:
+            return []
+
+        # Add the copies and mark the originals as requeued in one commit
+        with self._db.transaction():
+            self._db.add_tasks(new_tasks)
+            self._db.update_tasks(originals)
+
+        for new_task in new_tasks:
+            self._notify_change("task_added", new_task)
+
+        return new_tasks
 
     def register_callback(self, callback: Callable) -> None:
         """
@@ -263,25 +305,42 @@ class QueueManager:
         Events: task_added, task_updated, task_started, task_completed,
                 task_failed, task_cancelled, task_deleted, task_reordered,
                 tasks_cleared
+
+        Callbacks run on a separate worker thread, in the order the changes
+        happened.
         """
-        if callback not in self._callbacks:
-            self._callbacks.append(callback)
+        with self._callbacks_lock:
+            if callback not in self._callbacks:
+                self._callbacks = self._callbacks + (callback,)
 
     def unregister_callback(self, callback: Callable) -> None:
         """Unregister a callback."""
-        if callback in self._callbacks:
-            self._callbacks.remove(callback)
+        with self._callbacks_lock:
+            self._callbacks = tuple(c for c in self._callbacks if c != callback)
 
     def _notify_change(self, event: str, task: Optional[Task]) -> None:
         """Notify all registered callbacks of a change."""
-        for callback in self._callbacks:
-            try:
-                callback(event, task)
-            except Exception as e:
-                print(f"[TaskScheduler] Callback error: {e}")
+        # Changes are notified from API, executor and callback threads at once;
+        # without the lock two of them could land on the same version
+        with self._version_lock:
+            self._version += 1
+        # The tuple is a snapshot: callbacks may (un)register from any thread
+        # meanwhile. The pool keeps them from holding up the queue operation.
+        callbacks = self._callbacks
+        if callbacks:
+            _get_callback_pool().submit(_run_callbacks, callbacks, event, task)
+
+
+# Global queue manager instance
+_queue_manager_instance: Optional[QueueManager] = None
+_queue_manager_instance_lock = threading.Lock()
 
 
-# Convenience function
 def get_queue_manager() -> QueueManager:
     """Get the global queue manager instance."""
-    return QueueManager()
+    global _queue_manager_instance
+    if _queue_manager_instance is None:
+        with _queue_manager_instance_lock:
+            if _queue_manager_instance is None:
+                _queue_manager_instance = QueueManager()
+    return _queue_manager_instance
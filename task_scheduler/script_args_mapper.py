@@ -11,33 +11,73 @@ Usage:
     # Get the mapping for current scripts
     mapping = get_cached_mapping()
 """
+from dataclasses import dataclass
+from typing import Optional
 
 # Lazy imports to avoid loading modules.scripts too early
 _scripts_module = None
 
 
 def _get_scripts():
-    """Lazy load the scripts module."""
-    global _scripts_module
+    """
+    Lazy load the scripts module.
+
+    Once it has loaded, this name is rebound to a function that just returns
+    the module, so later calls skip the check.
+    """
+    global _scripts_module, _get_scripts
     if _scripts_module is None:
         try:
             from modules import scripts
             _scripts_module = scripts
         except ImportError:
-            pass
-    return _scripts_module
+            return None
+
+    scripts_module = _scripts_module
+    _get_scripts = lambda: scripts_module
+    return scripts_module
+
+
+@dataclass(slots=True, frozen=True)
+class ArgInfo:
+    """
+    Field information for one script_args index.
+
+    A slotted record rather than a dict, as the mapping holds one per script
+    arg for the life of the WebUI.
+    """
+    index: int
+    script: Optional[str]
+    name: str
+    label: str
+    type: str
+
+    def to_dict(self) -> dict:
+        """Convert to a plain dict (e.g. for JSON output)."""
+        return {
+            "index": self.index,
+            "script": self.script,
+            "name": self.name,
+            "label": self.label,
+            "type": self.type,
+        }
+
+
+# Component info for script args without a known UI component
+_NO_COMPONENT = (None, None, "unknown")
 
 
 def get_script_args_mapping():
     """
     Build a mapping of script_args indices to field information.
 
-    Returns a dict like:
+    Returns a dict of ArgInfo like:
     {
-        0: {"name": "txt2img_prompt", "label": "Prompt", "script": None, "type": "Textbox"},
-        1: {"name": "txt2img_neg_prompt", "label": "Negative prompt", "script": None, "type": "Textbox"},
+        0: ArgInfo(index=0, script=None, name="txt2img_prompt", label="Prompt", type="Textbox"),
+        1: ArgInfo(index=1, script=None, name="txt2img_neg_prompt", label="Negative prompt", type="Textbox"),
         ...
-        50: {"name": "adetailer_enable", "label": "Enable ADetailer", "script": "ADetailer", "type": "Checkbox"},
+        50: ArgInfo(index=50, script="ADetailer", name="adetailer_enable", label="Enable ADetailer",
+                    type="Checkbox"),
         ...
     }
     """
@@ -73,37 +113,40 @@ def get_script_args_mapping():
             ui_components = []
 
             # Check if script has stored UI components
-            if hasattr(script, 'ui_components') and script.ui_components:
-                ui_components = script.ui_components
-            elif hasattr(script, 'infotext_fields') and script.infotext_fields:
+            script_ui_components = getattr(script, 'ui_components', None)
+            infotext_fields = getattr(script, 'infotext_fields', None)
+            if script_ui_components:
+                ui_components = script_ui_components
+            elif infotext_fields:
                 # Some scripts store field info here
-                for field_info in script.infotext_fields:
+                for field_info in infotext_fields:
                     if hasattr(field_info, '__iter__') and len(field_info) >= 2:
                         component, name = field_info[0], field_info[1]
                         ui_components.append((component, name))
 
+            # Fallback name/label prefixes, the same for all of the script's args
+            name_prefix = script_name.lower().replace(' ', '_') + "_"
+            label_prefix = script_name + " arg "
+
+            # (elem_id, label, type name) of the component for each arg, read
+            # in one pass; args past the known components get _NO_COMPONENT
+            arg_count = max(args_to - args_from, 0)
+            component_info = [
+                (getattr(component, 'elem_id', None), getattr(component, 'label', None),
+                 component.__class__.__name__)
+                for component in ui_components[:arg_count]
+            ]
+            component_info.extend([_NO_COMPONENT] * (arg_count - len(component_info)))
+
             # Map each argument index to its info
-            for idx in range(args_from, args_to):
-                relative_idx = idx - args_from
-
-                info = {
-                    "index": idx,
-                    "script": script_name,
-                    "name": f"{script_name.lower().replace(' ', '_')}_{relative_idx}",
-                    "label": f"{script_name} arg {relative_idx}",
-                    "type": "unknown"
-                }
-
-                # Try to get actual component info
-                if relative_idx < len(ui_components):
-                    component = ui_components[relative_idx]
-                    if hasattr(component, 'elem_id') and component.elem_id:
-                        info["name"] = component.elem_id
-                    if hasattr(component, 'label') and component.label:
-                        info["label"] = component.label
-                    info["type"] = component.__class__.__name__
-
-                mapping[idx] = info
+            for relative_idx, (name, label, type_name) in enumerate(component_info):
+                idx = args_from + relative_idx
+                if not name:
+                    name = name_prefix + str(relative_idx)
+                if not label:
+                    label = label_prefix + str(relative_idx)
+
+                mapping[idx] = ArgInfo(idx, script_name, name, label, type_name)
 
         print(f"[TaskScheduler:Mapper] Built mapping for {len(mapping)} arguments")
 
@@ -121,18 +164,19 @@ def map_script_args(script_args, mapping=None):
 
     Args:
         script_args: List of raw argument values
-        mapping: Optional pre-built mapping (will build if not provided)
+        mapping: Optional pre-built mapping (uses the cached one if not provided)
 
     Returns:
         List of dicts with 'index', 'name', 'label', 'script', 'type', 'value'
     """
     if mapping is None:
-        mapping = get_script_args_mapping()
+        mapping = get_cached_mapping() or {}
 
     result = []
     for idx, value in enumerate(script_args):
-        if idx in mapping:
-            entry = mapping[idx].copy()
+        info = mapping.get(idx)
+        if info is not None:
+            entry = info.to_dict()
             entry["value"] = value
         else:
             entry = {
@@ -154,18 +198,31 @@ _mapping_built = False
 
 
 def get_cached_mapping():
-    """Get or build the cached mapping."""
-    global _cached_mapping, _mapping_built
+    """
+    Get or build the cached mapping.
+
+    After the first build this name is rebound to a function that just
+    returns the cached mapping (until invalidate_mapping_cache() is called).
+    References taken before then keep working, with the check.
+    """
+    global _cached_mapping, _mapping_built, get_cached_mapping
 
     if not _mapping_built:
         _cached_mapping = get_script_args_mapping()
         _mapping_built = True
 
-    return _cached_mapping
+    mapping = _cached_mapping
+    get_cached_mapping = lambda: mapping
+    return mapping
+
+
+# The building get_cached_mapping, restored when the cache is invalidated
+_build_cached_mapping = get_cached_mapping
 
 
 def invalidate_mapping_cache():
     """Invalidate the cached mapping (call when scripts change)."""
-    global _cached_mapping, _mapping_built
+    global _cached_mapping, _mapping_built, get_cached_mapping
     _cached_mapping = None
     _mapping_built = False
+    get_cached_mapping = _build_cached_mapping
@@ -5,48 +5,167 @@ Properly handles ControlNetUnit and other complex objects that need special
 treatment when storing to/loading from the database.
 """
 import json
+import math
 from dataclasses import is_dataclass, asdict
-from typing import Any, List
+from enum import Enum
+from typing import Any, Dict, List
 import numpy as np
 
+from .controlnet_helper import _field_names, get_controlnet_unit_class, is_controlnet_unit
 
-def _is_controlnet_unit(obj) -> bool:
-    """Check if an object is a ControlNetUnit."""
-    return type(obj).__name__ == 'ControlNetUnit'
+# orjson is optional: when installed it encodes/decodes the stored JSON faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
-def _is_controlnet_unit_dict(d: dict) -> bool:
-    """Check if a dict looks like a serialized ControlNetUnit."""
-    if not isinstance(d, dict):
-        return False
-    # ControlNetUnit has these characteristic fields
-    cn_fields = {'enabled', 'module', 'model', 'weight'}
-    return cn_fields.issubset(d.keys())
+def _has_non_finite(value: Any) -> bool:
+    """
+    Check if a value holds NaN or +/-Infinity floats, at any depth.
+
+    Also looks inside numpy arrays and dataclasses (e.g. ControlNetUnit
+    fields), as script args hold those. Arrays of 2 or more dimensions are
+    skipped, since serializing drops them.
+    """
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (float, np.floating)):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, np.ndarray):
+            if item.ndim >= 2:
+                continue
+            if item.dtype.kind == 'f':
+                if not np.isfinite(item).all():
+                    return True
+            elif item.dtype.hasobject:
+                stack.extend(item.tolist())
+        elif is_dataclass(item) and not isinstance(item, type):
+            stack.extend(getattr(item, name) for name in _field_names(type(item)))
+    return False
+
+
+def _json_dumps(value: Any) -> str:
+    """Encode a value as JSON text, with orjson if it's available."""
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; the stdlib encoder handles those
+        else:
+            # orjson writes NaN and +/-Infinity as null; the stdlib encoder
+            # keeps them (e.g. Forge's default s_tmax of inf)
+            if b"null" not in encoded or not _has_non_finite(value):
+                return encoded.decode()
+    return json.dumps(value)
+
+
+def _json_loads(text: str) -> Any:
+    """Decode JSON text, with orjson if it's available."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except ValueError:
+            pass  # e.g. NaN written by the stdlib encoder, which orjson rejects
+    return json.loads(text)
+
+
+# Exact types stored as-is (subclasses such as enums go through _serialize_value)
+_JSON_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+# Whether values of a type are dataclass instances, per type seen
+_DATACLASS_TYPES: Dict[type, bool] = {}
+
+
+def _is_plain_json(value: Any) -> bool:
+    """Check if a list/tuple/dict holds only JSON scalars, at any depth (so serializing leaves it as is)."""
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        item_type = type(item)
+        if item_type in _JSON_SCALARS:
+            continue
+        if item_type is list or item_type is tuple:
+            stack.extend(item)
+        elif item_type is dict:
+            stack.extend(item.values())
+        else:
+            return False
+    return True
+
+
+def _dataclass_to_dict(obj: Any) -> dict:
+    """
+    asdict() for the dataclass values script_args hold.
+
+    Fields are read directly (field names are cached per class) instead of
+    through asdict()'s deep copy, which would copy ControlNet image arrays
+    only to drop them. Only when a field holds something asdict() converts
+    differently (nested dataclasses, containers of them) is asdict() used.
+    """
+    d = {name: getattr(obj, name) for name in _field_names(type(obj))}
+    for v in d.values():
+        v_type = type(v)
+        if not (v_type in _JSON_SCALARS or v_type is np.ndarray or isinstance(v, Enum)
+                or ((v_type is list or v_type is dict or v_type is tuple) and _is_plain_json(v))):
+            return asdict(obj)
+    return d
+
+
+def _serialize_fields(d: dict) -> dict:
+    """Serialize the field values of a dataclass dict (from _dataclass_to_dict)."""
+    # The dict nearly always holds something to convert, so go straight to
+    # the fields rather than first scanning it as a whole
+    return {k: _serialize_value(v) for k, v in d.items()}
+
+
+def _serialize_ndarray(value: np.ndarray) -> Any:
+    """Serialize a numpy array script arg."""
+    # Skip image data - too large and not needed for most cases
+    if value.ndim >= 2:
+        return None
+    return value.tolist()
 
 
 def _serialize_value(value: Any) -> Any:
     """Serialize a single value for JSON storage."""
-    if value is None:
-        return None
+    # Exact built-in types are dispatched on type identity; isinstance checks
+    # further down only see subclasses and other objects
+    value_type = type(value)
+    if value_type in _JSON_SCALARS:
+        return value
+    if value_type is list or value_type is dict or value_type is tuple:
+        # Containers of plain values need no rebuilding; the encoder writes tuples as lists
+        if _is_plain_json(value):
+            return value
+        if value_type is dict:
+            return {k: _serialize_value(v) for k, v in value.items()}
+        return [_serialize_value(v) for v in value]
+    if value_type is np.ndarray:
+        return _serialize_ndarray(value)
 
     # Handle ControlNetUnit
-    if _is_controlnet_unit(value):
+    if is_controlnet_unit(value):
         # Convert to dict, marking it as a ControlNetUnit
         try:
-            d = asdict(value)
+            # Serialize the fields (dropping images) in a single pass
+            d = _serialize_fields(_dataclass_to_dict(value))
             d['__type__'] = 'ControlNetUnit'
-            # Handle numpy arrays in the dict
-            return _serialize_value(d)
+            return d
         except Exception as e:
             print(f"[TaskScheduler:Serializer] Error serializing ControlNetUnit: {e}")
             return None
 
     # Handle numpy arrays
     if isinstance(value, np.ndarray):
-        # Skip image data - too large and not needed for most cases
-        if value.ndim >= 2:
-            return None
-        return value.tolist()
+        return _serialize_ndarray(value)
 
     # Handle dicts recursively
     if isinstance(value, dict):
@@ -57,12 +176,15 @@ def _serialize_value(value: Any) -> Any:
         serialized = [_serialize_value(v) for v in value]
         return serialized
 
-    # Handle other dataclasses
-    if is_dataclass(value) and not isinstance(value, type):
+    # Handle other dataclasses (instances only: a dataclass class has type `type`)
+    value_is_dataclass = _DATACLASS_TYPES.get(value_type)
+    if value_is_dataclass is None:
+        value_is_dataclass = _DATACLASS_TYPES[value_type] = is_dataclass(value_type)
+    if value_is_dataclass:
         try:
-            d = asdict(value)
+            d = _serialize_fields(_dataclass_to_dict(value))
             d['__type__'] = type(value).__name__
-            return _serialize_value(d)
+            return d
         except Exception:
             return str(value)
 
@@ -89,15 +211,14 @@ def _deserialize_value(value: Any) -> Any:
 
     # Handle dicts that might be ControlNetUnit
     if isinstance(value, dict):
-        type_marker = value.get('__type__')
-
-        if type_marker == 'ControlNetUnit' or _is_controlnet_unit_dict(value):
+        # Marked ControlNetUnits, or dicts with its characteristic fields
+        # (chained key checks, which stop at the first missing key)
+        if (value.get('__type__') == 'ControlNetUnit'
+                or ('enabled' in value and 'module' in value and 'model' in value and 'weight' in value)):
             try:
                 # Remove type marker before creating unit
                 clean_dict = {k: v for k, v in value.items() if k != '__type__'}
-                # Import ControlNetUnit lazily
-                from lib_controlnet.external_code import ControlNetUnit
-                unit = ControlNetUnit.from_dict(clean_dict)
+                unit = get_controlnet_unit_class().from_dict(clean_dict)
                 return unit
             except ImportError:
                 print("[TaskScheduler:Serializer] ControlNet not available")
@@ -118,11 +239,31 @@ def _deserialize_value(value: Any) -> Any:
     return value
 
 
+# orjson encodes these natively, differently from _serialize_value, so have
+# it hand them to _orjson_default instead
+_ORJSON_SCRIPT_ARGS_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson is not None else 0
+)
+
+
+def _orjson_default(value: Any) -> Any:
+    """orjson `default` hook: serialize a value orjson can't encode itself."""
+    serialized = _serialize_value(value)
+    if serialized is value:
+        # Float subclasses (e.g. numpy.float64) pass _serialize_value as they
+        # are, but orjson only encodes exact floats
+        return float(value)
+    return serialized
+
+
 def serialize_script_args(script_args: List[Any]) -> str:
     """
     Serialize script_args list to JSON string.
 
-    Properly handles ControlNetUnit and other complex objects.
+    Properly handles ControlNetUnit and other complex objects. With orjson,
+    the list is encoded in one pass, serializing complex values as they're
+    reached, rather than first building a serialized copy of the list.
 
     Args:
         script_args: List of script arguments
@@ -130,8 +271,21 @@ def serialize_script_args(script_args: List[Any]) -> str:
     Returns:
         JSON string representation
     """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(script_args, default=_orjson_default, option=_ORJSON_SCRIPT_ARGS_OPTIONS)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; the copy below goes to the stdlib encoder
+        else:
+            # orjson writes NaN and +/-Infinity as null, which would later be
+            # replaced by the script's default; those args take the copy below
+            if b"null" not in encoded or not _has_non_finite(script_args):
+                return encoded.decode()
+    # Args holding only plain JSON values serialize to themselves, so skip the copy
+    if _is_plain_json(script_args):
+        return _json_dumps(script_args)
     serialized = [_serialize_value(arg) for arg in script_args]
-    return json.dumps(serialized)
+    return _json_dumps(serialized)
 
 
 def deserialize_script_args(json_str: str) -> List[Any]:
@@ -150,7 +304,7 @@ def deserialize_script_args(json_str: str) -> List[Any]:
         return []
 
     try:
-        data = json.loads(json_str)
+        data = _json_loads(json_str)
         if not isinstance(data, list):
             return []
         return [_deserialize_value(arg) for arg in data]
@@ -0,0 +1,44 @@
+"""Tests for TaskDatabase."""
+from task_scheduler.db import TaskDatabase
+from task_scheduler.models import Task
+
+
+def test_update_list_view_task_keeps_unloaded_fields(tmp_path):
+    db = TaskDatabase(str(tmp_path / "tasks.db"))
+    try:
+        db.add_task(Task(
+            params={"prompt": "a cat"},
+            script_args=[1, "x"],
+            result_images=["out/1.png"],
+            result_info="Steps: 20",
+        ))
+
+        # List views load tasks without script_args or the results
+        task = db.get_all_tasks()[0]
+        task.name = "renamed"
+        db.update_task(task)
+
+        stored = db.get_task(task.id)
+        assert stored.name == "renamed"
+        assert stored.script_args == [1, "x"]
+        assert stored.result_images == ["out/1.png"]
+        assert stored.result_info == "Steps: 20"
+    finally:
+        db.close()
+
+
+def test_update_list_view_task_writes_reassigned_fields(tmp_path):
+    db = TaskDatabase(str(tmp_path / "tasks.db"))
+    try:
+        db.add_task(Task(script_args=[1], result_images=["out/1.png"], result_info="Steps: 20"))
+
+        task = db.get_all_tasks()[0]
+        task.result_images = ["out/2.png"]
+        db.update_task(task)
+
+        stored = db.get_task(task.id)
+        assert stored.script_args == [1]
+        assert stored.result_images == ["out/2.png"]
+        assert stored.result_info == "Steps: 20"
+    finally:
+        db.close()
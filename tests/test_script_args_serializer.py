@@ -0,0 +1,52 @@
+"""Tests for the script_args / params JSON encoding."""
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from task_scheduler.script_args_serializer import (
+    _json_dumps, _json_loads, deserialize_script_args, serialize_script_args,
+)
+
+
+@dataclass
+class _Slider:
+    value: float
+
+
+def test_json_dumps_keeps_non_finite_floats():
+    # Forge's default s_tmax is inf; orjson alone would store it as null
+    params = {"s_tmax": math.inf, "s_churn": 0.0, "extra": [None, -math.inf, math.nan]}
+
+    decoded = _json_loads(_json_dumps(params))
+
+    assert decoded["s_tmax"] == math.inf
+    assert decoded["s_churn"] == 0.0
+    assert decoded["extra"][0] is None
+    assert decoded["extra"][1] == -math.inf
+    assert math.isnan(decoded["extra"][2])
+
+
+def test_json_dumps_finite_values_unchanged():
+    params = {"prompt": "a cat", "steps": 20, "cfg_scale": 7.0, "seed": None}
+
+    assert _json_loads(_json_dumps(params)) == params
+
+
+def test_serialize_script_args_keeps_non_finite_floats():
+    # A null would be replaced by the script's default when the task runs
+    args = [None, math.inf, np.float64("nan"), np.array([1.0, -np.inf]), _Slider(math.inf)]
+
+    decoded = deserialize_script_args(serialize_script_args(args))
+
+    assert decoded[0] is None
+    assert decoded[1] == math.inf
+    assert math.isnan(decoded[2])
+    assert decoded[3] == [1.0, -math.inf]
+    assert decoded[4] == {"value": math.inf, "__type__": "_Slider"}
+
+
+def test_serialize_script_args_nulls_without_non_finite_floats():
+    args = [None, 1.5, "x", np.array([1.0, 2.0])]
+
+    assert deserialize_script_args(serialize_script_args(args)) == [None, 1.5, "x", [1.0, 2.0]]